@@ -0,0 +1,192 @@
+"""
+Response cache
+Uses Redis when REDIS_URL is configured, otherwise a bounded per-process
+TTL/LRU store. Values are stored as JSON
+Sync routes use get/set/delete; coroutines use aget/aset so a Redis round
+trip never blocks the event loop
+"""
+
+import json
+import logging
+import threading
+from typing import Any, Optional, Tuple
+
+import s2sphere
+from cachetools import TLRUCache
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Most entries the in-process store keeps; least recently used go first
+LOCAL_CACHE_MAX_SIZE = 10000
+
+# Revenue summary periods accepted by /owner/revenue-summary
+REVENUE_PERIODS = ("day", "week", "month", "year")
+
+# How long a WebSocket auth user snapshot is reused (seconds)
+WS_USER_TTL = 300
+
+# How long OSM lookups (geocoding, routes, nearby places) are reused (seconds)
+MAPS_CACHE_TTL = 86400
+
+# How long a stale OSM lookup with an ETag/Last-Modified is kept so it can
+# be revalidated with a conditional GET (seconds)
+MAPS_REVALIDATE_TTL = 7 * 86400
+
+# S2 cell levels that route / nearby-place keys snap coordinates to, so GPS
+# jitter of a few meters still hits the same entry
+# (level 18 cells are ~35 m across, level 16 ~150 m)
+ROUTE_CELL_LEVEL = 18
+NEARBY_CELL_LEVEL = 16
+
+
+class Cache:
+    """Small get/set/delete cache with per-key TTL"""
+
+    def __init__(self, redis_url: str = "", max_size: int = LOCAL_CACHE_MAX_SIZE):
+        self._redis = None
+        self._aredis = None
+        # (ttl, raw) per key; each entry expires ttl seconds after it is set
+        self._store: TLRUCache = TLRUCache(
+            maxsize=max_size, ttu=lambda key, value, now: now + value[0]
+        )
+        # Sync routes run in the threadpool, so guard the local store
+        self._lock = threading.Lock()
+
+        if redis_url:
+            import redis
+            import redis.asyncio
+
+            self._redis = redis.Redis.from_url(redis_url, decode_responses=True)
+            self._aredis = redis.asyncio.Redis.from_url(
+                redis_url, decode_responses=True
+            )
+
+    def _local_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._store.get(key)
+        return entry[1] if entry is not None else None
+
+    def _local_set(self, key: str, raw: str, ttl: int):
+        with self._lock:
+            self._store[key] = (ttl, raw)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss"""
+        if self._redis is not None:
+            try:
+                raw = self._redis.get(key)
+            except Exception as e:
+                logger.warning("Cache get error: %s", e)
+                return None
+        else:
+            raw = self._local_get(key)
+
+        return json.loads(raw) if raw is not None else None
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """get() for coroutines (non-blocking with Redis)"""
+        if self._aredis is not None:
+            try:
+                raw = await self._aredis.get(key)
+            except Exception as e:
+                logger.warning("Cache get error: %s", e)
+                return None
+        else:
+            raw = self._local_get(key)
+
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: int):
+        """Store a JSON-serializable value for ttl seconds"""
+        raw = json.dumps(value)
+        if self._redis is not None:
+            try:
+                self._redis.set(key, raw, ex=ttl)
+            except Exception as e:
+                logger.warning("Cache set error: %s", e)
+        else:
+            self._local_set(key, raw, ttl)
+
+    async def aset(self, key: str, value: Any, ttl: int):
+        """set() for coroutines (non-blocking with Redis)"""
+        raw = json.dumps(value)
+        if self._aredis is not None:
+            try:
+                await self._aredis.set(key, raw, ex=ttl)
+            except Exception as e:
+                logger.warning("Cache set error: %s", e)
+        else:
+            self._local_set(key, raw, ttl)
+
+    def delete(self, *keys: str):
+        """Drop keys (missing keys are ignored)"""
+        if not keys:
+            return
+        if self._redis is not None:
+            try:
+                self._redis.delete(*keys)
+            except Exception as e:
+                logger.warning("Cache delete error: %s", e)
+        else:
+            with self._lock:
+                for key in keys:
+                    self._store.pop(key, None)
+
+    async def aclose(self):
+        """Close the async Redis connection pool (call from app shutdown)"""
+        if self._aredis is not None:
+            await self._aredis.aclose()
+
+
+def owner_dashboard_key(owner_id: int) -> str:
+    return f"owner:{owner_id}:dashboard"
+
+
+def owner_revenue_key(owner_id: int, period: str) -> str:
+    return f"owner:{owner_id}:revenue:{period}"
+
+
+def invalidate_owner_stats(owner_id: int):
+    """Drop an owner's cached dashboard and revenue summaries"""
+    cache.delete(
+        owner_dashboard_key(owner_id),
+        *(owner_revenue_key(owner_id, period) for period in REVENUE_PERIODS),
+    )
+
+
+def ws_user_key(user_id: int) -> str:
+    return f"ws_user:{user_id}"
+
+
+def geo_cell(lat: float, lng: float, level: int) -> int:
+    """ID of the S2 cell at the given level containing the point"""
+    point = s2sphere.LatLng.from_degrees(lat, lng)
+    return s2sphere.CellId.from_lat_lng(point).parent(level).id()
+
+
+def geocode_key(address: str) -> str:
+    return f"geo:{address.strip().lower()}"
+
+
+def reverse_geocode_key(lat: float, lng: float) -> str:
+    # Addresses change within meters, so this keeps ~1 m rounding
+    return f"rgeo:{round(lat, 5)}:{round(lng, 5)}"
+
+
+def route_key(
+    start_lat: float, start_lng: float, end_lat: float, end_lng: float, detail: str
+) -> str:
+    start = geo_cell(start_lat, start_lng, ROUTE_CELL_LEVEL)
+    end = geo_cell(end_lat, end_lng, ROUTE_CELL_LEVEL)
+    return f"route:{start}:{end}:{detail}"
+
+
+def nearby_key(lat: float, lng: float, radius: int, place_type: str) -> str:
+    cell = geo_cell(lat, lng, NEARBY_CELL_LEVEL)
+    return f"nearby:{cell}:{radius}:{place_type}"
+
+
+# Singleton instance
+cache = Cache(settings.REDIS_URL)
@@ -13,11 +13,17 @@ class Settings(BaseSettings):
     )
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_DAYS: int = 7
+    # bcrypt work factor for new hashes (existing hashes keep their own)
+    BCRYPT_ROUNDS: int = 12
 
     # Application
     APP_NAME: str = "Bus AgentUB API"
     DEBUG: bool = True
 
+    # Cache (Redis when set, in-process memory otherwise)
+    REDIS_URL: str = ""
+    OWNER_STATS_CACHE_TTL: int = 60  # seconds
+
     # CORS (for frontend)
     CORS_ORIGINS: list = [
         "http://localhost:3000",
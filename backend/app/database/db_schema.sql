@@ -9,6 +9,9 @@ DROP TABLE IF EXISTS boarding_points CASCADE;
 DROP TABLE IF EXISTS buses CASCADE;
 DROP TABLE IF EXISTS users CASCADE;
 
+-- Extensions
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 -- ENUM types
 CREATE TYPE user_role AS ENUM ('passenger', 'supervisor', 'owner');
 CREATE TYPE booking_status AS ENUM ('pending', 'accepted', 'rejected', 'cancelled');
@@ -64,8 +67,12 @@ CREATE TABLE buses (
 CREATE INDEX idx_buses_route ON buses(route_from, route_to);
 CREATE INDEX idx_buses_departure_time ON buses(departure_time);
 CREATE INDEX idx_buses_owner ON buses(owner_id);
+CREATE INDEX idx_buses_owner_id ON buses(owner_id, id);
 CREATE INDEX idx_buses_supervisor ON buses(supervisor_id);
 CREATE INDEX idx_buses_active ON buses(is_active);
+-- Trigram indexes so ILIKE '%city%' route searches avoid a sequential scan
+CREATE INDEX idx_buses_route_from_trgm ON buses USING gin (route_from gin_trgm_ops);
+CREATE INDEX idx_buses_route_to_trgm ON buses USING gin (route_to gin_trgm_ops);
 
 -- =====================================================
 -- BOARDING POINTS
@@ -108,6 +115,7 @@ CREATE TABLE bookings (
 CREATE INDEX idx_bookings_passenger ON bookings(passenger_id);
 CREATE INDEX idx_bookings_bus ON bookings(bus_id);
 CREATE INDEX idx_bookings_status ON bookings(status);
+CREATE INDEX idx_bookings_bus_status ON bookings(bus_id, status);
 CREATE INDEX idx_bookings_request_time ON bookings(request_time);
 
 -- =====================================================
@@ -135,6 +143,32 @@ CREATE INDEX idx_tickets_booking ON tickets(booking_id);
 CREATE INDEX idx_tickets_boarding_point ON tickets(boarding_point_id);
 CREATE INDEX idx_tickets_status ON tickets(status);
 CREATE INDEX idx_tickets_created_at ON tickets(created_at);
+CREATE INDEX idx_tickets_booking_status_created ON tickets(booking_id, status, created_at);
+
+-- =====================================================
+-- REPORTING VIEWS
+-- =====================================================
+
+-- daily confirmed revenue per owner, refreshed nightly by the app
+-- (app/services/revenue_view.py, REFRESH ... CONCURRENTLY); create_all
+-- builds the same view from app/models/owner_revenue_daily.py
+CREATE MATERIALIZED VIEW owner_revenue_daily AS
+SELECT
+    b.owner_id,
+    DATE(t.created_at) AS day,
+    SUM(t.total_fare) AS revenue,
+    SUM(t.seats_booked) AS tickets,
+    COUNT(t.id) AS ticket_count,
+    -- refresh time (UTC); days before its date are complete in the view
+    (now() AT TIME ZONE 'UTC') AS refreshed_at
+FROM tickets t
+JOIN bookings bk ON bk.id = t.booking_id
+JOIN buses b ON b.id = bk.bus_id
+WHERE t.status = 'confirmed'
+GROUP BY b.owner_id, DATE(t.created_at);
+
+-- unique index is required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX idx_owner_revenue_daily ON owner_revenue_daily(owner_id, day);
 
 -- =====================================================
 -- TRIGGERS
@@ -0,0 +1,19 @@
+"""
+Refresh the owner_revenue_daily materialized view (PostgreSQL only)
+The app refreshes it nightly on its own (services/revenue_view.py); run this
+to refresh by hand, e.g. after bulk-importing tickets:
+    cd backend && python app/database/refresh_revenue_view.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.services.revenue_view import refresh_owner_revenue_daily
+
+
+if __name__ == "__main__":
+    if refresh_owner_revenue_daily():
+        print("owner_revenue_daily refreshed successfully")
+    else:
+        print("owner_revenue_daily is PostgreSQL only, nothing to refresh")
@@ -1,8 +1,35 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
-from fastapi.responses import Response
+from fastapi.responses import ORJSONResponse, Response
 from starlette.middleware.base import BaseHTTPMiddleware
+from app.cache import cache
 from app.config import settings
+from app.logging_config import setup_logging, stop_logging
 from app.routers import auth, bookings, buses, location, owner, websocket
+from app.services.location_batcher import location_batcher
+from app.services.maps_service import maps_service
+from app.services.revenue_view import revenue_view_refresher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background services with the application"""
+    setup_logging()
+    # Build the OpenAPI schema (and load the schema examples) at startup
+    # so the first /docs or /openapi.json request doesn't pay for it
+    app.openapi()
+    maps_service.warm_up()
+    location_batcher.start()
+    maps_service.start()
+    revenue_view_refresher.start()
+    yield
+    await revenue_view_refresher.stop()
+    await location_batcher.stop()
+    await maps_service.aclose()
+    await cache.aclose()
+    stop_logging()
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -10,6 +37,8 @@ app = FastAPI(
     description="Privacy-first bus booking system with real-time tracking",
     version="1.0.0",
     debug=settings.DEBUG,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 
@@ -59,6 +88,8 @@ class FlexibleCORSMiddleware(BaseHTTPMiddleware):
             response.headers["Access-Control-Allow-Headers"] = (
                 "Content-Type, Authorization, Accept"
             )
+            # Let browser clients read the keyset pagination cursor
+            response.headers["Access-Control-Expose-Headers"] = "X-Next-Cursor"
         
         return response
 
@@ -1,6 +1,7 @@
 from .boarding_point import BoardingPoint
 from .booking import Booking, BookingStatus
 from .bus import Bus, BusType
+from .owner_revenue_daily import owner_revenue_daily
 from .ticket import Ticket, TicketStatus
 from .user import User, UserRole
 
@@ -14,4 +15,5 @@ __all__ = [
     "BookingStatus",
     "Ticket",
     "TicketStatus",
+    "owner_revenue_daily",
 ]
@@ -1,6 +1,6 @@
 import enum
 
-from sqlalchemy import TIMESTAMP, Column, Enum, ForeignKey, Integer, Text
+from sqlalchemy import TIMESTAMP, Column, Enum, ForeignKey, Index, Integer, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -16,6 +16,10 @@ class BookingStatus(enum.Enum):
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        # Per-bus booking counts by status (owner dashboard)
+        Index("idx_bookings_bus_status", "bus_id", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     passenger_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -1,14 +1,17 @@
 import enum
 
 from sqlalchemy import (
+    DDL,
     DECIMAL,
     TIMESTAMP,
     Boolean,
     Column,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     String,
+    event,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -24,6 +27,23 @@ class BusType(enum.Enum):
 
 class Bus(Base):
     __tablename__ = "buses"
+    __table_args__ = (
+        # Keyset pagination of an owner's buses (WHERE owner_id = ? AND id > ?)
+        Index("idx_buses_owner_id", "owner_id", "id"),
+        # Trigram GIN indexes serve the ILIKE '%city%' route search (PostgreSQL)
+        Index(
+            "idx_buses_route_from_trgm",
+            "route_from",
+            postgresql_using="gin",
+            postgresql_ops={"route_from": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "idx_buses_route_to_trgm",
+            "route_to",
+            postgresql_using="gin",
+            postgresql_ops={"route_to": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     bus_number = Column(String(20), unique=True, nullable=False, index=True)
@@ -53,3 +73,11 @@ class Bus(Base):
     supervisor = relationship("User", foreign_keys=[supervisor_id])
     boarding_points = relationship("BoardingPoint", back_populates="bus")
     bookings = relationship("Booking", back_populates="bus")
+
+
+# gin_trgm_ops needs the pg_trgm extension before the indexes are created
+event.listen(
+    Bus.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
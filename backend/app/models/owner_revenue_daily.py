@@ -0,0 +1,58 @@
+from sqlalchemy import DDL, DECIMAL, Date, DateTime, Integer, column, event, table
+
+from ..database import Base
+
+# Read-only handle on the owner_revenue_daily materialized view (PostgreSQL).
+# create_all builds the view through the DDL hooks below (same definition as
+# database/db_schema.sql); services/revenue_view.py refreshes it nightly.
+owner_revenue_daily = table(
+    "owner_revenue_daily",
+    column("owner_id", Integer),
+    column("day", Date),
+    column("revenue", DECIMAL(10, 2)),
+    column("tickets", Integer),  # seats sold
+    column("ticket_count", Integer),
+    # UTC time of the refresh that built the row (same on every row); days
+    # before its date are complete in the view
+    column("refreshed_at", DateTime),
+)
+
+# The view reads tickets, bookings and buses, so it is created once the whole
+# schema exists and dropped before any of those tables
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL(
+        """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS owner_revenue_daily AS
+        SELECT
+            b.owner_id,
+            DATE(t.created_at) AS day,
+            SUM(t.total_fare) AS revenue,
+            SUM(t.seats_booked) AS tickets,
+            COUNT(t.id) AS ticket_count,
+            (now() AT TIME ZONE 'UTC') AS refreshed_at
+        FROM tickets t
+        JOIN bookings bk ON bk.id = t.booking_id
+        JOIN buses b ON b.id = bk.bus_id
+        WHERE t.status = 'confirmed'
+        GROUP BY b.owner_id, DATE(t.created_at)
+        """
+    ).execute_if(dialect="postgresql"),
+)
+# Unique index is required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_owner_revenue_daily "
+        "ON owner_revenue_daily(owner_id, day)"
+    ).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Base.metadata,
+    "before_drop",
+    DDL("DROP MATERIALIZED VIEW IF EXISTS owner_revenue_daily").execute_if(
+        dialect="postgresql"
+    ),
+)
@@ -1,6 +1,6 @@
 import enum
 
-from sqlalchemy import DECIMAL, TIMESTAMP, Column, Enum, ForeignKey, Integer
+from sqlalchemy import DECIMAL, TIMESTAMP, Column, Enum, ForeignKey, Index, Integer
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -15,6 +15,12 @@ class TicketStatus(enum.Enum):
 
 class Ticket(Base):
     __tablename__ = "tickets"
+    __table_args__ = (
+        # Confirmed revenue by date for a booking set (owner reports)
+        Index(
+            "idx_tickets_booking_status_created", "booking_id", "status", "created_at"
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     booking_id = Column(Integer, ForeignKey("bookings.id"), nullable=False, unique=True)
@@ -1,6 +1,15 @@
 import enum
 
-from sqlalchemy import TIMESTAMP, Boolean, Column, Enum, ForeignKey, Integer, String
+from sqlalchemy import (
+    TIMESTAMP,
+    Boolean,
+    Column,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -15,6 +24,10 @@ class UserRole(enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Owner's active supervisors (owner supervisor list)
+        Index("idx_users_owner_role_active", "owner_id", "role", "is_active"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
@@ -1,12 +1,14 @@
 from datetime import timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
+from app.cache import cache, ws_user_key
 from app.config import settings
 from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.user import User
+from app.schemas.bus import AssignedBus
 from app.schemas.user import (
     TokenResponse,
     UserLogin,
@@ -45,7 +47,7 @@ def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
         )
 
     # Check if phone already exists
-    existing_user = db.query(User).filter(User.phone == user_data.phone).first()
+    existing_user = db.query(User.id).filter(User.phone == user_data.phone).first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -130,29 +132,28 @@ def login_user(login_data: UserLogin, db: Session = Depends(get_db)):
         from app.models.bus import Bus
 
         buses = (
-            db.query(Bus)
+            db.query(
+                Bus.id, Bus.bus_number, Bus.route_from, Bus.route_to, Bus.departure_time
+            )
             .filter(Bus.supervisor_id == user.id, Bus.is_active == True)
             .all()
         )
 
-        assigned_buses = [
-            {
-                "id": bus.id,
-                "bus_number": bus.bus_number,
-                "route_from": bus.route_from,
-                "route_to": bus.route_to,
-                "departure_time": bus.departure_time,
-            }
-            for bus in buses
-        ]
+        assigned_buses = [AssignedBus.model_validate(bus) for bus in buses]
 
-    return TokenResponse(
+    token_response = TokenResponse(
         access_token=access_token,
         token_type="bearer",
         user=user_response,
         assigned_buses=assigned_buses if user.role.value == "supervisor" else None,
     )
 
+    # Serialize once with pydantic-core; returning a Response skips FastAPI
+    # re-validating the model against response_model
+    return Response(
+        content=token_response.model_dump_json(), media_type="application/json"
+    )
+
 
 @router.get("/profile")
 async def get_profile(
@@ -160,11 +161,13 @@ async def get_profile(
 ):
     # Get assigned buses for supervisors
     assigned_buses = []
-    if current_user.role == "supervisor":
+    if current_user.role.value == "supervisor":
         from app.models import Bus
 
         buses = (
-            db.query(Bus)
+            db.query(
+                Bus.id, Bus.bus_number, Bus.route_from, Bus.route_to, Bus.departure_time
+            )
             .filter(Bus.supervisor_id == current_user.id, Bus.is_active == True)
             .all()
         )
@@ -188,7 +191,9 @@ async def get_profile(
         "is_active": current_user.is_active,
         "created_at": current_user.created_at,
         "updated_at": current_user.updated_at,
-        "assigned_buses": assigned_buses if current_user.role == "supervisor" else None,
+        "assigned_buses": (
+            assigned_buses if current_user.role.value == "supervisor" else None
+        ),
     }
 
 
@@ -209,7 +214,9 @@ def update_profile(
     """
     # Check if new phone already exists (if phone is being updated)
     if update_data.phone and update_data.phone != current_user.phone:
-        existing_user = db.query(User).filter(User.phone == update_data.phone).first()
+        existing_user = (
+            db.query(User.id).filter(User.phone == update_data.phone).first()
+        )
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -227,5 +234,6 @@ def update_profile(
 
     db.commit()
     db.refresh(current_user)
+    cache.delete(ws_user_key(current_user.id))
 
     return UserResponse.model_validate(current_user)
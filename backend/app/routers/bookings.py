@@ -4,6 +4,7 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session, joinedload
 
+from app.cache import invalidate_owner_stats
 from app.database import get_db
 from app.dependencies import (
     get_current_passenger,
@@ -23,7 +24,9 @@ from app.schemas.booking import (
     BookingRejectRequest,
     BookingRequestCreate,
     BookingStatusResponse,
+    ReasonBody,
 )
+from app.schemas.bus import BoardingPointBasic, BusSummary
 from app.schemas.ticket import (
     TicketCancelRequest,
     TicketConfirmRequest,
@@ -35,6 +38,11 @@ from app.schemas.ticket import (
 router = APIRouter(prefix="/booking", tags=["Booking Management"])
 
 
+def _reason_body(reason: Optional[str]) -> Optional[ReasonBody]:
+    """Wrap a legacy request's reason as the body the path-ID handlers take"""
+    return ReasonBody(reason=reason) if reason else None
+
+
 @router.post(
     "/request",
     response_model=BookingStatusResponse,
@@ -65,7 +73,7 @@ def create_booking_request(
 
     # Check if user already has a pending/accepted booking for this bus
     existing_booking = (
-        db.query(Booking)
+        db.query(Booking.id)
         .filter(
             Booking.passenger_id == current_user.id,
             Booking.bus_id == booking_data.bus_id,
@@ -90,6 +98,7 @@ def create_booking_request(
     db.add(new_booking)
     db.commit()
     db.refresh(new_booking)
+    invalidate_owner_stats(bus.owner_id)
 
     return BookingStatusResponse(
         booking_id=new_booking.id,
@@ -136,9 +145,9 @@ def get_booking_requests(
     return [BookingBasicResponse.model_validate(booking) for booking in bookings]
 
 
-@router.post("/accept", response_model=BookingAcceptanceResponse)
+@router.post("/{booking_id:int}/accept", response_model=BookingAcceptanceResponse)
 def accept_booking(
-    accept_data: BookingAcceptRequest,
+    booking_id: int,
     current_user: User = Depends(get_current_supervisor),
     db: Session = Depends(get_db),
 ):
@@ -149,7 +158,7 @@ def accept_booking(
     along with available boarding points.
     """
     # Get the booking
-    booking = db.query(Booking).filter(Booking.id == accept_data.booking_id).first()
+    booking = db.query(Booking).filter(Booking.id == booking_id).first()
     if not booking:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found"
@@ -193,17 +202,11 @@ def accept_booking(
     )
 
     boarding_points_data = [
-        {
-            "id": bp.id,
-            "name": bp.name,
-            "lat": float(bp.lat),
-            "lng": float(bp.lng),
-            "sequence_order": bp.sequence_order,
-        }
-        for bp in boarding_points
+        BoardingPointBasic.model_validate(bp) for bp in boarding_points
     ]
 
     db.commit()
+    invalidate_owner_stats(bus.owner_id)
 
     return BookingAcceptanceResponse(
         booking_id=booking.id,
@@ -214,9 +217,20 @@ def accept_booking(
     )
 
 
-@router.post("/reject", response_model=BookingStatusResponse)
+@router.post("/accept", response_model=BookingAcceptanceResponse, deprecated=True)
+def accept_booking_legacy(
+    accept_data: BookingAcceptRequest,
+    current_user: User = Depends(get_current_supervisor),
+    db: Session = Depends(get_db),
+):
+    """Deprecated: use POST /booking/{booking_id}/accept"""
+    return accept_booking(accept_data.booking_id, current_user, db)
+
+
+@router.post("/{booking_id:int}/reject", response_model=BookingStatusResponse)
 def reject_booking(
-    reject_data: BookingRejectRequest,
+    booking_id: int,
+    body: Optional[ReasonBody] = None,
     current_user: User = Depends(get_current_supervisor),
     db: Session = Depends(get_db),
 ):
@@ -226,7 +240,7 @@ def reject_booking(
     Changes booking status to rejected with optional reason.
     """
     # Get the booking
-    booking = db.query(Booking).filter(Booking.id == reject_data.booking_id).first()
+    booking = db.query(Booking).filter(Booking.id == booking_id).first()
     if not booking:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found"
@@ -250,9 +264,10 @@ def reject_booking(
     # Update booking status
     booking.status = BookingStatus.rejected
     booking.rejected_time = datetime.utcnow()
-    booking.rejection_reason = reject_data.reason
+    booking.rejection_reason = body.reason if body else None
 
     db.commit()
+    invalidate_owner_stats(bus.owner_id)
 
     return BookingStatusResponse(
         booking_id=booking.id,
@@ -261,9 +276,22 @@ def reject_booking(
     )
 
 
-@router.post("/cancel", response_model=BookingStatusResponse)
+@router.post("/reject", response_model=BookingStatusResponse, deprecated=True)
+def reject_booking_legacy(
+    reject_data: BookingRejectRequest,
+    current_user: User = Depends(get_current_supervisor),
+    db: Session = Depends(get_db),
+):
+    """Deprecated: use POST /booking/{booking_id}/reject"""
+    return reject_booking(
+        reject_data.booking_id, _reason_body(reject_data.reason), current_user, db
+    )
+
+
+@router.post("/{booking_id:int}/cancel", response_model=BookingStatusResponse)
 def cancel_booking(
-    cancel_data: BookingCancelRequest,
+    booking_id: int,
+    body: Optional[ReasonBody] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -274,7 +302,7 @@ def cancel_booking(
     Supervisors can cancel bookings for their assigned buses.
     """
     # Get the booking
-    booking = db.query(Booking).filter(Booking.id == cancel_data.booking_id).first()
+    booking = db.query(Booking).filter(Booking.id == booking_id).first()
     if not booking:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found"
@@ -318,9 +346,10 @@ def cancel_booking(
     # Update booking status
     booking.status = BookingStatus.cancelled
     booking.cancelled_time = datetime.utcnow()
-    booking.cancellation_reason = cancel_data.reason
+    booking.cancellation_reason = body.reason if body else None
 
     db.commit()
+    invalidate_owner_stats(bus.owner_id)
 
     return BookingStatusResponse(
         booking_id=booking.id,
@@ -329,6 +358,18 @@ def cancel_booking(
     )
 
 
+@router.post("/cancel", response_model=BookingStatusResponse, deprecated=True)
+def cancel_booking_legacy(
+    cancel_data: BookingCancelRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Deprecated: use POST /booking/{booking_id}/cancel"""
+    return cancel_booking(
+        cancel_data.booking_id, _reason_body(cancel_data.reason), current_user, db
+    )
+
+
 @router.post(
     "/ticket/confirm",
     response_model=TicketConfirmResponse,
@@ -366,7 +407,9 @@ def confirm_ticket(
         )
 
     # Check if ticket already exists
-    existing_ticket = db.query(Ticket).filter(Ticket.booking_id == booking.id).first()
+    existing_ticket = (
+        db.query(Ticket.id).filter(Ticket.booking_id == booking.id).first()
+    )
     if existing_ticket:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -413,30 +456,15 @@ def confirm_ticket(
     db.add(new_ticket)
     db.commit()
     db.refresh(new_ticket)
-
-    # Prepare response data
-    boarding_point_data = {
-        "id": boarding_point.id,
-        "name": boarding_point.name,
-        "lat": float(boarding_point.lat),
-        "lng": float(boarding_point.lng),
-        "sequence_order": boarding_point.sequence_order,
-    }
-
-    bus_details = {
-        "bus_number": bus.bus_number,
-        "route_from": bus.route_from,
-        "route_to": bus.route_to,
-        "departure_time": bus.departure_time,
-    }
+    invalidate_owner_stats(bus.owner_id)
 
     return TicketConfirmResponse(
         ticket_id=new_ticket.id,
         status=new_ticket.status,
         seats_booked=new_ticket.seats_booked,
         total_fare=new_ticket.total_fare,
-        boarding_point=boarding_point_data,
-        bus_details=bus_details,
+        boarding_point=BoardingPointBasic.model_validate(boarding_point),
+        bus_details=BusSummary.model_validate(bus),
         message="Ticket confirmed successfully",
     )
 
@@ -520,9 +548,10 @@ def get_my_tickets(
     return ticket_responses
 
 
-@router.post("/ticket/cancel", response_model=TicketStatusResponse)
+@router.post("/ticket/{ticket_id:int}/cancel", response_model=TicketStatusResponse)
 def cancel_ticket(
-    cancel_data: TicketCancelRequest,
+    ticket_id: int,
+    body: Optional[ReasonBody] = None,
     current_user: User = Depends(get_current_passenger),
     db: Session = Depends(get_db),
 ):
@@ -532,7 +561,7 @@ def cancel_ticket(
     Cancels a ticket and restores available seats.
     """
     # Get the ticket
-    ticket = db.query(Ticket).filter(Ticket.id == cancel_data.ticket_id).first()
+    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
     if not ticket:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found"
@@ -565,9 +594,10 @@ def cancel_ticket(
     # Cancel the associated booking as well
     booking.status = BookingStatus.cancelled
     booking.cancelled_time = datetime.utcnow()
-    booking.cancellation_reason = cancel_data.reason
+    booking.cancellation_reason = body.reason if body else None
 
     db.commit()
+    invalidate_owner_stats(bus.owner_id)
 
     return TicketStatusResponse(
         ticket_id=ticket.id,
@@ -576,6 +606,18 @@ def cancel_ticket(
     )
 
 
+@router.post("/ticket/cancel", response_model=TicketStatusResponse, deprecated=True)
+def cancel_ticket_legacy(
+    cancel_data: TicketCancelRequest,
+    current_user: User = Depends(get_current_passenger),
+    db: Session = Depends(get_db),
+):
+    """Deprecated: use POST /booking/ticket/{ticket_id}/cancel"""
+    return cancel_ticket(
+        cancel_data.ticket_id, _reason_body(cancel_data.reason), current_user, db
+    )
+
+
 @router.get("/{booking_id}")
 async def get_booking_details(
     booking_id: int,
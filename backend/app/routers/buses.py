@@ -1,82 +1,145 @@
-from datetime import datetime
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from sqlalchemy import func, lambda_stmt, select, update
 from sqlalchemy.orm import Session
 
+from app.cache import invalidate_owner_stats
 from app.database import get_db
 from app.dependencies import get_current_owner, get_current_user
 from app.models.boarding_point import BoardingPoint
-from app.models.bus import Bus, BusType
+from app.models.bus import Bus
 from app.models.user import User
 from app.schemas.user import UserRole
 from app.schemas.boarding_point import BoardingPointCreate, BoardingPointResponse
-from app.schemas.bus import BusCreate, BusDetailedResponse, BusPublicResponse, BusUpdate
+from app.schemas.bus import (
+    BusCreate,
+    BusDetailedResponse,
+    BusPublicResponse,
+    BusSearchFilters,
+    BusUpdate,
+)
 
 router = APIRouter(prefix="/buses", tags=["Bus Management"])
 
-@router.get("", response_model=List[BusPublicResponse])
+# ORDER BY clauses for bus search, keyed by (sort_by, order)
+SEARCH_ORDERING = {
+    ("fare", "asc"): Bus.fare.asc(),
+    ("fare", "desc"): Bus.fare.desc(),
+    ("departure_time", "asc"): Bus.departure_time.asc(),
+    ("departure_time", "desc"): Bus.departure_time.desc(),
+}
+
+# Query parameters accepted by bus search (anything else is ignored)
+SEARCH_FILTER_FIELDS = tuple(BusSearchFilters.model_fields)
+
+
+@lru_cache(maxsize=1024)
+def _parse_search_filters(query: Tuple[Tuple[str, str], ...]) -> BusSearchFilters:
+    return BusSearchFilters.model_validate(dict(query))
+
+
+def get_search_filters(request: Request) -> BusSearchFilters:
+    """
+    Validate bus search query parameters, reusing the result for
+    repeated identical queries (popular routes are searched constantly)
+    """
+    params = request.query_params
+    query = tuple(sorted((k, params[k]) for k in SEARCH_FILTER_FIELDS if k in params))
+    try:
+        return _parse_search_filters(query)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+
+def _search_filter_parameters() -> List[dict]:
+    """OpenAPI query parameter docs for BusSearchFilters"""
+    schema = BusSearchFilters.model_json_schema(
+        ref_template="#/components/schemas/{model}"
+    )
+    return [
+        {"name": name, "in": "query", "required": False, "schema": field_schema}
+        for name, field_schema in schema["properties"].items()
+    ]
+
+
+@router.get(
+    "",
+    response_model=List[BusPublicResponse],
+    openapi_extra={"parameters": _search_filter_parameters()},
+)
 def search_buses(
-    route_from: Optional[str] = Query(None, description="Departure city"),
-    route_to: Optional[str] = Query(None, description="Destination city"),
-    bus_type: Optional[BusType] = Query(None, description="Bus type filter"),
-    min_fare: Optional[float] = Query(None, ge=0, description="Minimum fare"),
-    max_fare: Optional[float] = Query(None, ge=0, description="Maximum fare"),
-    min_seats: Optional[int] = Query(None, ge=1, description="Minimum available seats"),
-    date: Optional[str] = Query(None, description="Departure date (YYYY-MM-DD)"),
-    sort_by: str = Query("departure_time", regex="^(fare|departure_time)$"),
-    order: str = Query("asc", regex="^(asc|desc)$"),
+    filters: BusSearchFilters = Depends(get_search_filters),
     db: Session = Depends(get_db),
 ):
     """
     Search for available buses (PUBLIC - no authentication required)
 
     Returns basic bus information without supervisor contact details.
-    Supports filtering by route, type, fare, seats, and date.
+    Supports filtering by route, type, fare, seats, and date
+    (date: YYYY-MM-DD).
     """
-    # Start with base query - only active buses
-    query = db.query(Bus).filter(Bus.is_active == True)
+    # Plain locals so lambda_stmt tracks them as bound parameters
+    route_from = filters.route_from
+    route_to = filters.route_to
+    bus_type = filters.bus_type
+    min_fare = filters.min_fare
+    max_fare = filters.max_fare
+    min_seats = filters.min_seats
+
+    # Start with base query - only active buses, and only the columns
+    # BusPublicResponse exposes.
+    # lambda_stmt caches the compiled SQL; only the bound parameters
+    # captured from the closures below change between requests.
+    stmt = lambda_stmt(
+        lambda: select(
+            Bus.id,
+            Bus.bus_number,
+            Bus.route_from,
+            Bus.route_to,
+            Bus.departure_time,
+            Bus.bus_type,
+            Bus.fare,
+            Bus.available_seats,
+            Bus.is_active,
+        ).where(Bus.is_active == True)
+    )
 
     # Apply filters
     if route_from:
-        query = query.filter(Bus.route_from.ilike(f"%{route_from}%"))
+        route_from_pattern = f"%{route_from}%"
+        stmt += lambda s: s.where(Bus.route_from.ilike(route_from_pattern))
 
     if route_to:
-        query = query.filter(Bus.route_to.ilike(f"%{route_to}%"))
+        route_to_pattern = f"%{route_to}%"
+        stmt += lambda s: s.where(Bus.route_to.ilike(route_to_pattern))
 
     if bus_type:
-        query = query.filter(Bus.bus_type == bus_type)
+        stmt += lambda s: s.where(Bus.bus_type == bus_type)
 
     if min_fare is not None:
-        query = query.filter(Bus.fare >= min_fare)
+        stmt += lambda s: s.where(Bus.fare >= min_fare)
 
     if max_fare is not None:
-        query = query.filter(Bus.fare <= max_fare)
+        stmt += lambda s: s.where(Bus.fare <= max_fare)
 
     if min_seats is not None:
-        query = query.filter(Bus.available_seats >= min_seats)
-
-    if date:
-        try:
-            date_obj = datetime.strptime(date, "%Y-%m-%d")
-            # Filter buses departing on this date
-            query = query.filter(db.func.date(Bus.departure_time) == date_obj.date())
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid date format. Use YYYY-MM-DD",
-            )
+        stmt += lambda s: s.where(Bus.available_seats >= min_seats)
+
+    if filters.date:
+        departure_date = filters.date.date()
+        # Filter buses departing on this date
+        stmt += lambda s: s.where(func.date(Bus.departure_time) == departure_date)
 
     # Apply sorting
-    if sort_by == "fare":
-        query = query.order_by(Bus.fare.desc() if order == "desc" else Bus.fare.asc())
-    else:  # departure_time
-        query = query.order_by(
-            Bus.departure_time.desc() if order == "desc" else Bus.departure_time.asc()
-        )
+    ordering = SEARCH_ORDERING[(filters.sort_by, filters.order)]
+    stmt += lambda s: s.order_by(ordering)
 
-    buses = query.all()
-    return [BusPublicResponse.model_validate(bus) for bus in buses]
+    rows = db.execute(stmt).all()
+    return [BusPublicResponse.model_validate(row) for row in rows]
 
 
 @router.post(
@@ -96,7 +159,9 @@ def create_bus(
     """
 
     # Check if bus number already exists
-    existing_bus = db.query(Bus).filter(Bus.bus_number == bus_data.bus_number).first()
+    existing_bus = (
+        db.query(Bus.id).filter(Bus.bus_number == bus_data.bus_number).first()
+    )
     if existing_bus:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -113,7 +178,7 @@ def create_bus(
     # ✅ UPDATED: Validate supervisor belongs to this owner
     if bus_data.supervisor_id:
         supervisor = (
-            db.query(User)
+            db.query(User.id)
             .filter(
                 User.id == bus_data.supervisor_id,
                 User.role == UserRole.SUPERVISOR,
@@ -146,6 +211,7 @@ def create_bus(
     db.add(new_bus)
     db.commit()
     db.refresh(new_bus)
+    invalidate_owner_stats(current_user.id)
 
     return BusDetailedResponse.model_validate(new_bus)
 
@@ -218,7 +284,7 @@ def update_bus(
     # Validate bus_number uniqueness if being updated
     if "bus_number" in update_data:
         existing = (
-            db.query(Bus)
+            db.query(Bus.id)
             .filter(Bus.bus_number == update_data["bus_number"], Bus.id != bus_id)
             .first()
         )
@@ -241,7 +307,7 @@ def update_bus(
     # ✅ UPDATED: Validate supervisor ownership if provided
     if "supervisor_id" in update_data and update_data["supervisor_id"]:
         supervisor = (
-            db.query(User)
+            db.query(User.id)
             .filter(
                 User.id == update_data["supervisor_id"],
                 User.role == UserRole.SUPERVISOR,
@@ -270,14 +336,26 @@ def update_bus(
         # Update available seats proportionally
         update_data["available_seats"] = new_capacity - booked_seats
 
-    # Apply updates
-    for key, value in update_data.items():
-        setattr(bus, key, value)
+    if not update_data:
+        return BusDetailedResponse.model_validate(bus)
+
+    # Apply updates - UPDATE ... RETURNING refreshes the row in the same
+    # round-trip instead of a separate SELECT after commit
+    stmt = (
+        update(Bus)
+        .where(Bus.id == bus_id)
+        .values(**update_data)
+        .returning(Bus)
+        .execution_options(populate_existing=True)
+    )
+    bus = db.execute(stmt).scalar_one()
 
+    # Build the response before commit expires the instance
+    response = BusDetailedResponse.model_validate(bus)
     db.commit()
-    db.refresh(bus)
+    invalidate_owner_stats(response.owner_id)
 
-    return BusDetailedResponse.model_validate(bus)
+    return response
 
 
 @router.delete("/{bus_id}", status_code=status.HTTP_200_OK)
@@ -316,6 +394,7 @@ def delete_bus(
     # Soft delete
     bus.is_active = False
     db.commit()
+    invalidate_owner_stats(current_user.id)
 
     return {
         "message": f"Bus {bus.bus_number} has been deactivated successfully",
@@ -400,7 +479,9 @@ def get_boarding_points(bus_id: int, db: Session = Depends(get_db)):
     Returns boarding points ordered by sequence.
     In production, this would require booking acceptance first.
     """
-    bus = db.query(Bus).filter(Bus.id == bus_id).first()
+    bus = db.execute(
+        lambda_stmt(lambda: select(Bus).where(Bus.id == bus_id))
+    ).scalar_one_or_none()
 
     if not bus:
         raise HTTPException(
@@ -410,9 +491,14 @@ def get_boarding_points(bus_id: int, db: Session = Depends(get_db)):
 
     # Get boarding points ordered by sequence
     stops = (
-        db.query(BoardingPoint)
-        .filter(BoardingPoint.bus_id == bus_id)
-        .order_by(BoardingPoint.sequence_order)
+        db.execute(
+            lambda_stmt(
+                lambda: select(BoardingPoint)
+                .where(BoardingPoint.bus_id == bus_id)
+                .order_by(BoardingPoint.sequence_order)
+            )
+        )
+        .scalars()
         .all()
     )
 
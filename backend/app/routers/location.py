@@ -1,19 +1,24 @@
+import logging
 from datetime import datetime
-from decimal import Decimal
+from typing import Literal
 
 from app.database import get_db
 from app.dependencies import get_current_supervisor, get_current_user
 from app.models.boarding_point import BoardingPoint
+from app.models.booking import Booking, BookingStatus
 from app.models.bus import Bus
 from app.models.user import User
-from app.routers.websocket import send_bus_location_update
 from app.schemas.location import GeocodeRequest
+from app.services.location_batcher import location_batcher
 from app.services.maps_service import maps_service
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import lambda_stmt, select
 from sqlalchemy.orm import Session
 
 router = APIRouter(prefix="/location", tags=["Location Services"])
 
+logger = logging.getLogger(__name__)
+
 
 @router.post("/bus/{bus_id}/update")
 async def update_bus_location(
@@ -26,7 +31,8 @@ async def update_bus_location(
     """
     Update bus location (SUPERVISOR only)
 
-    Updates the current location of a bus and broadcasts to connected clients.
+    Queues the new location of a bus; updates are coalesced per bus and
+    written/broadcast to connected clients in small batches.
     """
     # Get the bus
     bus = db.query(Bus).filter(Bus.id == bus_id).first()
@@ -42,15 +48,9 @@ async def update_bus_location(
             detail="You don't have permission to update location for this bus",
         )
 
-    # Update bus location
-    bus.current_lat = Decimal(str(lat))
-    bus.current_lng = Decimal(str(lng))
-    bus.last_location_update = datetime.utcnow()
-
-    db.commit()
-
-    # Broadcast location update to connected clients
-    await send_bus_location_update(bus_id, lat, lng)
+    # Queue the update; the batcher persists and broadcasts it shortly
+    updated_at = datetime.utcnow()
+    location_batcher.submit(bus_id, lat, lng, updated_at)
 
     return {
         "message": "Bus location updated successfully",
@@ -58,7 +58,7 @@ async def update_bus_location(
         "location": {
             "lat": lat,
             "lng": lng,
-            "updated_at": bus.last_location_update.isoformat(),
+            "updated_at": updated_at.isoformat(),
         },
     }
 
@@ -75,7 +75,9 @@ def get_bus_location(
     Returns the current location of a bus for authenticated users.
     """
     # Get the bus
-    bus = db.query(Bus).filter(Bus.id == bus_id).first()
+    bus = db.execute(
+        lambda_stmt(lambda: select(Bus).where(Bus.id == bus_id))
+    ).scalar_one_or_none()
     if not bus:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Bus not found"
@@ -86,17 +88,16 @@ def get_bus_location(
 
     if current_user.role.value == "passenger":
         # Passenger needs accepted booking for this bus
-        from app.models.booking import Booking, BookingStatus
-
-        booking = (
-            db.query(Booking)
-            .filter(
-                Booking.passenger_id == current_user.id,
-                Booking.bus_id == bus_id,
-                Booking.status == BookingStatus.accepted,
+        passenger_id = current_user.id
+        booking = db.execute(
+            lambda_stmt(
+                lambda: select(Booking.id).where(
+                    Booking.passenger_id == passenger_id,
+                    Booking.bus_id == bus_id,
+                    Booking.status == BookingStatus.accepted,
+                )
             )
-            .first()
-        )
+        ).first()
         has_access = booking is not None
 
     elif current_user.role.value == "supervisor":
@@ -374,6 +375,9 @@ async def geocode_address(
 @router.get("/route/{bus_id}")
 async def get_bus_route(
     bus_id: int,
+    detail: Literal["full", "none"] = Query(
+        "full", description="'none' skips route geometry and turn-by-turn steps"
+    ),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -452,9 +456,10 @@ async def get_bus_route(
                 origin["lng"],
                 destination["lat"],
                 destination["lng"],
+                detail=detail,
             )
-        except Exception as e:
-            print(f"Error getting route directions: {e}")
+        except Exception:
+            logger.exception("Error getting route directions")
 
     return {
         "bus_id": bus_id,
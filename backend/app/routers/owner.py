@@ -1,23 +1,31 @@
+from collections import defaultdict
 from datetime import date, datetime, timedelta
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import and_, case, distinct, func, or_
+from sqlalchemy.orm import Session, contains_eager, joinedload, selectinload
 
+from app.cache import cache, owner_dashboard_key, owner_revenue_key
+from app.config import settings
 from app.database import get_db
 from app.dependencies import get_current_owner, require_owner_or_supervisor
 from app.models.boarding_point import BoardingPoint
 from app.models.booking import Booking, BookingStatus
 from app.models.bus import Bus
+from app.models.owner_revenue_daily import owner_revenue_daily
 from app.models.ticket import Ticket, TicketStatus
 from app.models.user import User
 from app.schemas.user import UserRegister, UserRole
 from app.schemas.bus import BusOwnerResponse
+from app.services.revenue_view import revenue_view_exists
 from app.utils import hash_password
 
 router = APIRouter(prefix="/owner", tags=["Owner Dashboard"])
 
+# Rows fetched per round-trip when streaming report queries
+REPORT_BATCH_SIZE = 1000
+
 
 @router.get("/dashboard")
 def get_owner_dashboard(
@@ -28,90 +36,76 @@ def get_owner_dashboard(
 
     Returns summary statistics for buses, bookings, and revenue.
     """
-    # Get total buses owned by this user
-    total_buses = db.query(Bus).filter(Bus.owner_id == current_user.id).count()
-
-    # Get active trips (buses with upcoming departures)
-    active_trips = (
-        db.query(Bus)
-        .filter(
-            Bus.owner_id == current_user.id,
-            Bus.is_active == True,
-            Bus.departure_time > datetime.utcnow(),
-        )
-        .count()
-    )
-
-    # Get total bookings across all buses
-    total_bookings = (
-        db.query(Booking).join(Bus).filter(Bus.owner_id == current_user.id).count()
-    )
-
-    # Get confirmed bookings
-    confirmed_bookings = (
-        db.query(Booking)
-        .join(Bus)
-        .filter(
-            Bus.owner_id == current_user.id, Booking.status == BookingStatus.accepted
-        )
-        .count()
-    )
-
-    # Get total revenue from confirmed tickets
-    revenue_result = (
-        db.query(func.sum(Ticket.total_fare))
-        .join(Booking)
-        .join(Bus)
-        .filter(
-            Bus.owner_id == current_user.id, Ticket.status == TicketStatus.confirmed
-        )
-        .first()
-    )
+    # Serve from cache when fresh (invalidated on bus/booking/ticket writes)
+    cache_key = owner_dashboard_key(current_user.id)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
 
-    total_revenue = float(revenue_result[0]) if revenue_result[0] else 0.0
-
-    # Get today's revenue
+    now = datetime.utcnow()
     today_start = datetime.combine(date.today(), datetime.min.time())
-    today_revenue_result = (
-        db.query(func.sum(Ticket.total_fare))
-        .join(Booking)
-        .join(Bus)
-        .filter(
-            Bus.owner_id == current_user.id,
-            Ticket.status == TicketStatus.confirmed,
-            Ticket.created_at >= today_start,
+    is_confirmed = Ticket.status == TicketStatus.confirmed
+
+    # Compute every metric in one pass over the owner's buses, their
+    # bookings and tickets (tickets are one-to-one with bookings, so only
+    # the bus-level counts need DISTINCT)
+    stats = (
+        db.query(
+            func.count(distinct(Bus.id)).label("total_buses"),
+            func.count(
+                distinct(
+                    case(
+                        (and_(Bus.is_active == True, Bus.departure_time > now), Bus.id)
+                    )
+                )
+            ).label("active_trips"),
+            func.count(Booking.id).label("total_bookings"),
+            func.count(case((Booking.status == BookingStatus.accepted, 1))).label(
+                "confirmed_bookings"
+            ),
+            func.count(case((Booking.status == BookingStatus.pending, 1))).label(
+                "pending_bookings"
+            ),
+            func.sum(case((is_confirmed, Ticket.total_fare))).label("total_revenue"),
+            func.sum(
+                case(
+                    (
+                        and_(is_confirmed, Ticket.created_at >= today_start),
+                        Ticket.total_fare,
+                    )
+                )
+            ).label("today_revenue"),
         )
-        .first()
+        .select_from(Bus)
+        .outerjoin(Booking, Booking.bus_id == Bus.id)
+        .outerjoin(Ticket, Ticket.booking_id == Booking.id)
+        .filter(Bus.owner_id == current_user.id)
+        .one()
     )
 
-    today_revenue = float(today_revenue_result[0]) if today_revenue_result[0] else 0.0
-
-    # Get pending bookings
-    pending_bookings = (
-        db.query(Booking)
-        .join(Bus)
-        .filter(
-            Bus.owner_id == current_user.id, Booking.status == BookingStatus.pending
-        )
-        .count()
-    )
-
-    return {
-        "total_buses": total_buses,
-        "active_trips": active_trips,
-        "total_bookings": total_bookings,
-        "confirmed_bookings": confirmed_bookings,
-        "pending_bookings": pending_bookings,
-        "total_revenue": total_revenue,
-        "today_revenue": today_revenue,
-        "dashboard_date": datetime.utcnow().isoformat(),
+    dashboard = {
+        "total_buses": stats.total_buses,
+        "active_trips": stats.active_trips,
+        "total_bookings": stats.total_bookings,
+        "confirmed_bookings": stats.confirmed_bookings,
+        "pending_bookings": stats.pending_bookings,
+        "total_revenue": float(stats.total_revenue or 0),
+        "today_revenue": float(stats.today_revenue or 0),
+        "dashboard_date": now.isoformat(),
     }
 
+    cache.set(cache_key, dashboard, settings.OWNER_STATS_CACHE_TTL)
+    return dashboard
+
 
 @router.get("/buses", response_model=List[BusOwnerResponse])
 def get_owner_buses(
+    response: Response,
     supervisor_id: Optional[int] = Query(None, description="Filter by supervisor ID"),
     page: int = Query(1, ge=1, description="Page number"),
+    after_id: Optional[int] = Query(
+        None, ge=0, description="Return buses after this ID (overrides page)"
+    ),
     limit: int = Query(20, ge=1, le=100, description="Items per page"),
     current_user: User = Depends(get_current_owner),
     db: Session = Depends(get_db),
@@ -120,47 +114,65 @@ def get_owner_buses(
     List all buses owned by the current user (OWNER only)
 
     Returns detailed bus information with booking counts and supervisor details.
+    Pass the X-Next-Cursor response header back as after_id for the next page.
     """
-    # Build query
-    query = db.query(Bus).filter(Bus.owner_id == current_user.id)
+    # Per-bus counts as grouped subqueries, limited to this owner's buses
+    boarding_point_counts = (
+        db.query(BoardingPoint.bus_id, func.count(BoardingPoint.id).label("count"))
+        .join(Bus, Bus.id == BoardingPoint.bus_id)
+        .filter(Bus.owner_id == current_user.id)
+        .group_by(BoardingPoint.bus_id)
+        .subquery()
+    )
+    booking_counts = (
+        db.query(Booking.bus_id, func.count(Booking.id).label("count"))
+        .join(Bus, Bus.id == Booking.bus_id)
+        .filter(Bus.owner_id == current_user.id)
+        .group_by(Booking.bus_id)
+        .subquery()
+    )
+
+    # Build query - supervisors are loaded in one extra SELECT ... IN
+    query = (
+        db.query(
+            Bus,
+            func.coalesce(boarding_point_counts.c.count, 0),
+            func.coalesce(booking_counts.c.count, 0),
+        )
+        .outerjoin(boarding_point_counts, boarding_point_counts.c.bus_id == Bus.id)
+        .outerjoin(booking_counts, booking_counts.c.bus_id == Bus.id)
+        .filter(Bus.owner_id == current_user.id)
+        .options(selectinload(Bus.supervisor))
+    )
 
     # Filter by supervisor if specified
     if supervisor_id:
         query = query.filter(Bus.supervisor_id == supervisor_id)
 
-    # Apply pagination
-    offset = (page - 1) * limit
-    buses = query.offset(offset).limit(limit).all()
+    # Apply pagination - keyset when a cursor is given, offset otherwise.
+    # One extra row tells us whether there is a next page.
+    query = query.order_by(Bus.id)
+    if after_id is not None:
+        query = query.filter(Bus.id > after_id)
+    else:
+        query = query.offset((page - 1) * limit)
+    rows = query.limit(limit + 1).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1][0].id)
 
     # Convert to response format with additional data
+    # (response models are frozen, so counts are set via model_copy)
     bus_responses = []
-    for bus in buses:
-        # Get boarding points count
-        boarding_points_count = (
-            db.query(BoardingPoint).filter(BoardingPoint.bus_id == bus.id).count()
+    for bus, boarding_points_count, total_bookings in rows:
+        bus_data = BusOwnerResponse.model_validate(bus).model_copy(
+            update={
+                "boarding_points_count": boarding_points_count,
+                "total_bookings": total_bookings,
+            }
         )
 
-        # Get total bookings count
-        total_bookings = db.query(Booking).filter(Booking.bus_id == bus.id).count()
-
-        # Get supervisor details
-        supervisor = None
-        if bus.supervisor_id:
-            supervisor_user = (
-                db.query(User).filter(User.id == bus.supervisor_id).first()
-            )
-            if supervisor_user:
-                supervisor = {
-                    "id": supervisor_user.id,
-                    "name": supervisor_user.name,
-                    "phone": supervisor_user.phone,
-                }
-
-        bus_data = BusOwnerResponse.model_validate(bus)
-        bus_data.boarding_points_count = boarding_points_count
-        bus_data.total_bookings = total_bookings
-        bus_data.supervisor = supervisor
-
         bus_responses.append(bus_data)
 
     return bus_responses
@@ -182,11 +194,19 @@ def get_ticket_sales_report(
 
     Returns revenue breakdown by bus and date range.
     """
-    # Build base query for tickets
+    # Build base query - one aggregated row per bus
     query = (
-        db.query(Ticket)
-        .join(Booking)
-        .join(Bus)
+        db.query(
+            Bus.id,
+            Bus.bus_number,
+            Bus.route_from,
+            Bus.route_to,
+            func.sum(Ticket.total_fare).label("revenue"),
+            func.sum(Ticket.seats_booked).label("seats"),
+            func.count(Ticket.id).label("ticket_count"),
+        )
+        .join(Booking, Booking.bus_id == Bus.id)
+        .join(Ticket, Ticket.booking_id == Booking.id)
         .filter(Ticket.status == TicketStatus.confirmed)
     )
     
@@ -207,53 +227,42 @@ def get_ticket_sales_report(
         to_datetime = datetime.combine(to_date, datetime.max.time())
         query = query.filter(Ticket.created_at <= to_datetime)
 
-    # Apply bus filter
+    # Apply bus filter (the role filter above already limits access)
     if bus_id:
         query = query.filter(Bus.id == bus_id)
-        # Verify user has access to this bus
+
+    # Stream the per-bus rows in batches and aggregate in a single pass
+    total_revenue = 0.0
+    total_tickets = 0
+    breakdown_by_bus = []
+    rows = query.group_by(Bus.id, Bus.bus_number, Bus.route_from, Bus.route_to)
+    for row in rows.yield_per(REPORT_BATCH_SIZE):
+        revenue = float(row.revenue)
+        total_revenue += revenue
+        total_tickets += row.ticket_count
+        breakdown_by_bus.append(
+            {
+                "bus_id": row.id,
+                "bus_number": row.bus_number,
+                "route": f"{row.route_from} - {row.route_to}",
+                "tickets_sold": row.seats,
+                "revenue": revenue,
+            }
+        )
+
+    # No rows for a specific bus means no sales or no access - only then
+    # look the bus up to tell the two apart
+    if bus_id and not breakdown_by_bus:
         if current_user.role.value == "owner":
-            bus = (
-                db.query(Bus)
-                .filter(Bus.id == bus_id, Bus.owner_id == current_user.id)
-                .first()
-            )
+            has_access = Bus.owner_id == current_user.id
         else:  # supervisor
-            bus = (
-                db.query(Bus)
-                .filter(Bus.id == bus_id, Bus.supervisor_id == current_user.id)
-                .first()
-            )
-        
-        if not bus:
+            has_access = Bus.supervisor_id == current_user.id
+        if db.query(Bus.id).filter(Bus.id == bus_id, has_access).scalar() is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Bus not found or access denied",
             )
 
-    tickets = query.all()
-
-    # Calculate totals
-    total_revenue = sum(float(ticket.total_fare) for ticket in tickets)
-    total_tickets = len(tickets)
-
-    # Group by bus
-    breakdown_by_bus = {}
-    for ticket in tickets:
-        bus = ticket.booking.bus
-        bus_key = f"{bus.bus_number} ({bus.route_from} - {bus.route_to})"
-
-        if bus_key not in breakdown_by_bus:
-            breakdown_by_bus[bus_key] = {
-                "bus_id": bus.id,
-                "bus_number": bus.bus_number,
-                "route": f"{bus.route_from} - {bus.route_to}",
-                "tickets_sold": 0,
-                "revenue": 0.0,
-            }
-
-        breakdown_by_bus[bus_key]["tickets_sold"] += ticket.seats_booked
-        breakdown_by_bus[bus_key]["revenue"] += float(ticket.total_fare)
-
     return {
         "total_revenue": total_revenue,
         "total_tickets_sold": total_tickets,
@@ -261,7 +270,7 @@ def get_ticket_sales_report(
             "from": from_date.isoformat() if from_date else None,
             "to": to_date.isoformat() if to_date else None,
         },
-        "breakdown_by_bus": list(breakdown_by_bus.values()),
+        "breakdown_by_bus": breakdown_by_bus,
         "report_generated_at": datetime.utcnow().isoformat(),
     }
 
@@ -286,21 +295,29 @@ def get_owner_supervisors(
         .all()
     )
 
+    # Get assigned buses for all supervisors in one query
+    assigned_buses = defaultdict(list)
+    if supervisors:
+        supervisor_ids = [supervisor.id for supervisor in supervisors]
+        buses = (
+            db.query(Bus.id, Bus.bus_number, Bus.supervisor_id)
+            .filter(Bus.supervisor_id.in_(supervisor_ids))
+            .all()
+        )
+        for bus in buses:
+            assigned_buses[bus.supervisor_id].append(
+                {"id": bus.id, "bus_number": bus.bus_number}
+            )
+
     result = []
     for supervisor in supervisors:
-        # Get assigned buses
-        assigned_buses = db.query(Bus).filter(Bus.supervisor_id == supervisor.id).all()
-
         result.append(
             {
                 "id": supervisor.id,
                 "name": supervisor.name,
                 "phone": supervisor.phone,
                 "is_active": supervisor.is_active,
-                "assigned_buses": [
-                    {"id": bus.id, "bus_number": bus.bus_number}
-                    for bus in assigned_buses
-                ],
+                "assigned_buses": assigned_buses[supervisor.id],
             }
         )
 
@@ -317,7 +334,7 @@ def register_supervisor(
     Owner registers a new supervisor and links them
     """
     # Check if phone already exists
-    existing = db.query(User).filter(User.phone == supervisor_data.phone).first()
+    existing = db.query(User.id).filter(User.phone == supervisor_data.phone).first()
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -351,9 +368,13 @@ def register_supervisor(
 
 @router.get("/bookings")
 def get_owner_bookings(
+    response: Response,
     bus_id: Optional[int] = Query(None, description="Filter by bus ID"),
     status_filter: Optional[str] = Query(None, description="Filter by booking status"),
     page: int = Query(1, ge=1, description="Page number"),
+    after_id: Optional[int] = Query(
+        None, ge=0, description="Return bookings after this ID (overrides page)"
+    ),
     limit: int = Query(20, ge=1, le=100, description="Items per page"),
     current_user: User = Depends(get_current_owner),
     db: Session = Depends(get_db),
@@ -362,24 +383,21 @@ def get_owner_bookings(
     Get all bookings for owner's buses (OWNER only)
 
     Returns booking details with passenger information.
+    Pass the X-Next-Cursor response header back as after_id for the next page.
     """
-    # Build query
-    query = db.query(Booking).join(Bus).filter(Bus.owner_id == current_user.id)
+    # Build query - bus comes from the owner-filter join and passenger from
+    # a joined load, so the loop below issues no per-booking queries
+    query = (
+        db.query(Booking)
+        .join(Booking.bus)
+        .options(contains_eager(Booking.bus), joinedload(Booking.passenger))
+        .filter(Bus.owner_id == current_user.id)
+    )
 
     # Apply filters
     if bus_id:
+        # Access is checked below only if nothing matches
         query = query.filter(Booking.bus_id == bus_id)
-        # Verify owner has access to this bus
-        bus = (
-            db.query(Bus)
-            .filter(Bus.id == bus_id, Bus.owner_id == current_user.id)
-            .first()
-        )
-        if not bus:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Bus not found or access denied",
-            )
 
     if status_filter:
         try:
@@ -390,9 +408,32 @@ def get_owner_bookings(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid status filter"
             )
 
-    # Apply pagination
-    offset = (page - 1) * limit
-    bookings = query.offset(offset).limit(limit).all()
+    # Apply pagination - keyset when a cursor is given, offset otherwise.
+    # One extra row tells us whether there is a next page.
+    query = query.order_by(Booking.id)
+    if after_id is not None:
+        query = query.filter(Booking.id > after_id)
+    else:
+        query = query.offset((page - 1) * limit)
+    bookings = query.limit(limit + 1).all()
+
+    if len(bookings) > limit:
+        bookings = bookings[:limit]
+        response.headers["X-Next-Cursor"] = str(bookings[-1].id)
+
+    # No rows for a specific bus means no bookings or no access - only then
+    # look the bus up to tell the two apart
+    if bus_id and not bookings:
+        owns_bus = (
+            db.query(Bus.id)
+            .filter(Bus.id == bus_id, Bus.owner_id == current_user.id)
+            .scalar()
+        )
+        if owns_bus is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Bus not found or access denied",
+            )
 
     # Convert to response format
     booking_responses = []
@@ -437,7 +478,17 @@ def get_revenue_summary(
     Get revenue summary for different time periods (OWNER only)
 
     Returns revenue data grouped by the specified period.
+
+    On PostgreSQL, whole past days come from the owner_revenue_daily view, up
+    to its last refresh. A past-day ticket cancelled since that refresh still
+    counts in those days until the next nightly refresh.
     """
+    # Serve from cache when fresh (invalidated on bus/booking/ticket writes)
+    cache_key = owner_revenue_key(current_user.id, period)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     # Calculate date range based on period
     now = datetime.utcnow()
 
@@ -456,43 +507,93 @@ def get_revenue_summary(
         )
         end_date = now
 
-    # Get tickets in the period
-    tickets = (
-        db.query(Ticket)
-        .join(Booking)
-        .join(Bus)
+    # Revenue per day in the period, grouped in the database
+    day = func.date(Ticket.created_at).label("day")
+    live_query = (
+        db.query(
+            day,
+            func.sum(Ticket.total_fare).label("revenue"),
+            func.sum(Ticket.seats_booked).label("seats"),
+            func.count(Ticket.id).label("ticket_count"),
+        )
+        .join(Booking, Booking.id == Ticket.booking_id)
+        .join(Bus, Bus.id == Booking.bus_id)
         .filter(
             Bus.owner_id == current_user.id,
             Ticket.status == TicketStatus.confirmed,
             Ticket.created_at >= start_date,
             Ticket.created_at <= end_date,
         )
-        .all()
+        .group_by(day)
+        .order_by(day)
     )
 
-    # Calculate totals
-    total_revenue = sum(float(ticket.total_fare) for ticket in tickets)
-    total_tickets = len(tickets)
+    refreshed_at = None
+    if db.get_bind().dialect.name == "postgresql" and revenue_view_exists(db):
+        # Every row carries the time of the refresh that built it
+        refreshed_at = (
+            db.query(owner_revenue_daily.c.refreshed_at)
+            .filter(owner_revenue_daily.c.owner_id == current_user.id)
+            .limit(1)
+            .scalar()
+        )
 
-    # Group by date
-    revenue_by_date = {}
-    for ticket in tickets:
-        date_key = ticket.created_at.date().isoformat()
+    if refreshed_at is not None:
+        # Whole days the last refresh saw complete come from the view; later
+        # days (today, and any missed refresh) and a partial first day (week
+        # period) are queried live
+        view_until = min(now.date(), refreshed_at.date())
+        view_from = start_date.date()
+        if start_date.time() != datetime.min.time():
+            view_from += timedelta(days=1)
+        view_from_start = datetime.combine(view_from, datetime.min.time())
+        view_until_start = datetime.combine(view_until, datetime.min.time())
+
+        view_rows = (
+            db.query(
+                owner_revenue_daily.c.day,
+                owner_revenue_daily.c.revenue,
+                owner_revenue_daily.c.tickets.label("seats"),
+                owner_revenue_daily.c.ticket_count,
+            )
+            .filter(
+                owner_revenue_daily.c.owner_id == current_user.id,
+                owner_revenue_daily.c.day >= view_from,
+                owner_revenue_daily.c.day < view_until,
+            )
+            .all()
+        )
+        live_rows = live_query.filter(
+            or_(
+                Ticket.created_at < view_from_start,
+                Ticket.created_at >= view_until_start,
+            )
+        ).all()
+        rows = sorted(view_rows + live_rows, key=lambda row: row.day)
+    else:
+        rows = live_query.all()
 
-        if date_key not in revenue_by_date:
-            revenue_by_date[date_key] = {"date": date_key, "revenue": 0.0, "tickets": 0}
+    # Calculate totals
+    total_revenue = sum(float(row.revenue) for row in rows)
+    total_tickets = sum(row.ticket_count for row in rows)
 
-        revenue_by_date[date_key]["revenue"] += float(ticket.total_fare)
-        revenue_by_date[date_key]["tickets"] += ticket.seats_booked
+    # Group by date (DATE() comes back as a date or an ISO string by dialect)
+    revenue_by_date = [
+        {"date": str(row.day), "revenue": float(row.revenue), "tickets": row.seats}
+        for row in rows
+    ]
 
-    return {
+    summary = {
         "period": period,
         "start_date": start_date.isoformat(),
         "end_date": end_date.isoformat(),
         "total_revenue": total_revenue,
         "total_tickets": total_tickets,
-        "revenue_by_date": list(revenue_by_date.values()),
+        "revenue_by_date": revenue_by_date,
         "average_ticket_value": total_revenue / total_tickets
         if total_tickets > 0
         else 0.0,
     }
+
+    cache.set(cache_key, summary, settings.OWNER_STATS_CACHE_TTL)
+    return summary
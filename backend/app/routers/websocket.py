@@ -1,12 +1,14 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import Dict, List
-import json
+from typing import Dict, Literal, Optional, Set
+import msgspec
+import orjson
 import asyncio
 from datetime import datetime
 
+from app.cache import WS_USER_TTL, cache, ws_user_key
 from app.database import get_db
-from app.models.user import User
+from app.models.user import User, UserRole
 from app.models.bus import Bus
 from app.models.booking import Booking
 from app.models.ticket import Ticket
@@ -15,72 +17,136 @@ from app.utils import decode_access_token
 router = APIRouter(tags=["WebSocket"])
 
 
+# Wire formats a client can pick with ?encoding=; msgpack is sent as binary frames
+Encoding = Literal["json", "msgpack"]
+
+_msgpack_encoder = msgspec.msgpack.Encoder()
+
+
+def _dumps(message: dict) -> str:
+    """Serialize a message for send_text (orjson encodes datetimes natively)"""
+    return orjson.dumps(message).decode()
+
+
+class _Frames:
+    """A message serialized lazily, at most once per wire format"""
+
+    __slots__ = ("message", "_text", "_binary")
+
+    def __init__(self, message: dict):
+        self.message = message
+        self._text: Optional[str] = None
+        self._binary: Optional[bytes] = None
+
+    def text(self) -> str:
+        if self._text is None:
+            self._text = _dumps(self.message)
+        return self._text
+
+    def binary(self) -> bytes:
+        if self._binary is None:
+            self._binary = _msgpack_encoder.encode(self.message)
+        return self._binary
+
+
 class ConnectionManager:
     """Manages WebSocket connections for real-time updates"""
     
     def __init__(self):
         # Store active connections by user_id
-        self.active_connections: Dict[int, List[WebSocket]] = {}
+        self.active_connections: Dict[int, Set[WebSocket]] = {}
         # Store bus location connections by bus_id
-        self.bus_connections: Dict[int, List[WebSocket]] = {}
+        self.bus_connections: Dict[int, Set[WebSocket]] = {}
+        # Latest broadcast location by bus_id, served to new subscribers
+        self.last_location: Dict[int, dict] = {}
+        # Connections that asked for msgpack binary frames
+        self.msgpack_connections: Set[WebSocket] = set()
     
-    async def connect_user(self, websocket: WebSocket, user_id: int):
-        """Connect a user for booking updates"""
+    async def _accept(self, websocket: WebSocket, encoding: Encoding):
         await websocket.accept()
-        if user_id not in self.active_connections:
-            self.active_connections[user_id] = []
-        self.active_connections[user_id].append(websocket)
+        if encoding == "msgpack":
+            self.msgpack_connections.add(websocket)
+    
+    async def send(self, websocket: WebSocket, message: dict):
+        """Send one message in the connection's wire format"""
+        await self._send(websocket, _Frames(message))
+    
+    async def _send(self, websocket: WebSocket, frames: _Frames):
+        if websocket in self.msgpack_connections:
+            await websocket.send_bytes(frames.binary())
+        else:
+            await websocket.send_text(frames.text())
+    
+    async def connect_user(self, websocket: WebSocket, user_id: int, encoding: Encoding = "json"):
+        """Connect a user for booking updates"""
+        await self._accept(websocket, encoding)
+        self.active_connections.setdefault(user_id, set()).add(websocket)
     
     async def disconnect_user(self, websocket: WebSocket, user_id: int):
         """Disconnect a user"""
+        self.msgpack_connections.discard(websocket)
         if user_id in self.active_connections:
-            self.active_connections[user_id].remove(websocket)
+            self.active_connections[user_id].discard(websocket)
             if not self.active_connections[user_id]:
                 del self.active_connections[user_id]
     
-    async def connect_bus_location(self, websocket: WebSocket, bus_id: int):
+    async def connect_bus_location(self, websocket: WebSocket, bus_id: int, encoding: Encoding = "json"):
         """Connect for bus location updates"""
-        await websocket.accept()
-        if bus_id not in self.bus_connections:
-            self.bus_connections[bus_id] = []
-        self.bus_connections[bus_id].append(websocket)
+        await self._accept(websocket, encoding)
+        self.subscribe_bus(websocket, bus_id)
+    
+    def subscribe_bus(self, websocket: WebSocket, bus_id: int):
+        """Add an already accepted connection to a bus's location updates"""
+        self.bus_connections.setdefault(bus_id, set()).add(websocket)
     
     async def disconnect_bus_location(self, websocket: WebSocket, bus_id: int):
         """Disconnect from bus location updates"""
+        self.msgpack_connections.discard(websocket)
         if bus_id in self.bus_connections:
-            self.bus_connections[bus_id].remove(websocket)
+            self.bus_connections[bus_id].discard(websocket)
             if not self.bus_connections[bus_id]:
                 del self.bus_connections[bus_id]
     
+    async def _fanout(self, connections: Set[WebSocket], frames: _Frames):
+        """Send frames to all connections concurrently, pruning dead ones"""
+        targets = list(connections)
+        results = await asyncio.gather(
+            *(self._send(connection, frames) for connection in targets),
+            return_exceptions=True,
+        )
+        # Remove dead connections
+        connections.difference_update(
+            connection
+            for connection, result in zip(targets, results)
+            if isinstance(result, Exception)
+        )
+    
     async def send_booking_update(self, user_id: int, message: dict):
         """Send booking update to a specific user"""
         if user_id in self.active_connections:
-            for connection in self.active_connections[user_id]:
-                try:
-                    await connection.send_text(json.dumps(message))
-                except:
-                    # Remove dead connections
-                    self.active_connections[user_id].remove(connection)
+            await self._fanout(self.active_connections[user_id], _Frames(message))
     
     async def send_bus_location_update(self, bus_id: int, message: dict):
         """Send bus location update to all connected clients"""
+        location = message["location"]
+        self.last_location[bus_id] = {
+            "lat": location["lat"],
+            "lng": location["lng"],
+            "last_update": location["timestamp"],
+        }
         if bus_id in self.bus_connections:
-            for connection in self.bus_connections[bus_id]:
-                try:
-                    await connection.send_text(json.dumps(message))
-                except:
-                    # Remove dead connections
-                    self.bus_connections[bus_id].remove(connection)
+            await self._fanout(self.bus_connections[bus_id], _Frames(message))
     
     async def broadcast_booking_update(self, message: dict):
         """Broadcast booking update to all connected users"""
-        for user_id, connections in self.active_connections.items():
-            for connection in connections:
-                try:
-                    await connection.send_text(json.dumps(message))
-                except:
-                    # Remove dead connections
-                    self.active_connections[user_id].remove(connection)
+        # Serialize once per wire format, not once per connection
+        frames = _Frames(message)
+        await asyncio.gather(
+            *(
+                self._fanout(connections, frames)
+                for connections in list(self.active_connections.values())
+            )
+        )
 
 
 # Global connection manager
@@ -96,6 +162,18 @@ def get_user_from_token(token: str, db: Session) -> User:
             detail="Invalid token"
         )
     
+    # Reuse a recent snapshot instead of hitting the DB on every (re)connect.
+    # Only active users are cached; the token itself is verified above.
+    cache_key = ws_user_key(token_data.user_id)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return User(
+            id=cached["id"],
+            name=cached["name"],
+            role=UserRole(cached["role"]),
+            is_active=True,
+        )
+    
     user = db.query(User).filter(User.id == token_data.user_id).first()
     if not user or not user.is_active:
         raise HTTPException(
@@ -103,57 +181,115 @@ def get_user_from_token(token: str, db: Session) -> User:
             detail="User not found or inactive"
         )
     
+    cache.set(
+        cache_key,
+        {"id": user.id, "name": user.name, "role": user.role.value},
+        WS_USER_TTL,
+    )
     return user
 
 
+def get_location_bus(user: User, bus_id: int, db: Session) -> Bus:
+    """Get a bus whose live location the user may follow"""
+    bus = db.query(Bus).filter(Bus.id == bus_id).first()
+    if not bus:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bus not found"
+        )
+    
+    # Check permissions - passenger needs accepted booking, supervisor needs assigned bus
+    has_access = False
+    
+    if user.role.value == "passenger":
+        # Check if passenger has accepted booking for this bus
+        booking = db.query(Booking).filter(
+            Booking.passenger_id == user.id,
+            Booking.bus_id == bus_id,
+            Booking.status == "accepted"
+        ).first()
+        has_access = booking is not None
+    
+    elif user.role.value == "supervisor":
+        # Check if supervisor is assigned to this bus
+        has_access = bus.supervisor_id == user.id
+    
+    elif user.role.value == "owner":
+        # Owner has access to all their buses
+        has_access = bus.owner_id == user.id
+    
+    if not has_access:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied to bus location"
+        )
+    
+    return bus
+
+
+def location_snapshot(bus: Bus) -> Optional[dict]:
+    """Latest known location of a bus, or None if it has never reported one"""
+    # Prefer the last broadcast location; the DB copy may lag a flush behind
+    last_location = manager.last_location.get(bus.id)
+    if last_location is None and bus.current_lat and bus.current_lng:
+        last_location = {
+            "lat": float(bus.current_lat),
+            "lng": float(bus.current_lng),
+            "last_update": bus.last_location_update
+        }
+    return last_location
+
+
 @router.websocket("/ws/booking")
-async def websocket_booking_updates(websocket: WebSocket, token: str, db: Session = Depends(get_db)):
+async def websocket_booking_updates(websocket: WebSocket, token: str, encoding: Encoding = "json",
+                                    db: Session = Depends(get_db)):
     """
     WebSocket endpoint for booking status updates
     
     Clients connect with JWT token to receive real-time booking updates.
+    Pass ?encoding=msgpack to receive msgpack binary frames instead of JSON text.
     """
     try:
         # Authenticate user
         user = get_user_from_token(token, db)
         
         # Connect user
-        await manager.connect_user(websocket, user.id)
+        await manager.connect_user(websocket, user.id, encoding)
         
         # Send welcome message
-        await websocket.send_text(json.dumps({
+        await manager.send(websocket, {
             "type": "connected",
             "message": f"Connected as {user.name} ({user.role.value})",
             "user_id": user.id,
-            "timestamp": datetime.utcnow().isoformat()
-        }))
+            "timestamp": datetime.utcnow()
+        })
         
         # Keep connection alive and handle incoming messages
         while True:
             try:
                 # Wait for messages from client (heartbeat, etc.)
                 data = await websocket.receive_text()
-                message = json.loads(data)
+                message = orjson.loads(data)
                 
                 # Handle different message types
                 if message.get("type") == "ping":
-                    await websocket.send_text(json.dumps({
+                    await manager.send(websocket, {
                         "type": "pong",
-                        "timestamp": datetime.utcnow().isoformat()
-                    }))
+                        "timestamp": datetime.utcnow()
+                    })
                 
             except WebSocketDisconnect:
                 break
-            except json.JSONDecodeError:
-                await websocket.send_text(json.dumps({
+            except orjson.JSONDecodeError:
+                await manager.send(websocket, {
                     "type": "error",
                     "message": "Invalid JSON format"
-                }))
+                })
             except Exception as e:
-                await websocket.send_text(json.dumps({
+                await manager.send(websocket, {
                     "type": "error",
                     "message": str(e)
-                }))
+                })
     
     except HTTPException as e:
         await websocket.close(code=4001, reason=e.detail)
@@ -165,52 +301,23 @@ async def websocket_booking_updates(websocket: WebSocket, token: str, db: Sessio
 
 
 @router.websocket("/ws/location/{bus_id}")
-async def websocket_bus_location(websocket: WebSocket, bus_id: int, token: str, db: Session = Depends(get_db)):
+async def websocket_bus_location(websocket: WebSocket, bus_id: int, token: str, encoding: Encoding = "json",
+                                 db: Session = Depends(get_db)):
     """
     WebSocket endpoint for real-time bus location updates
     
     Clients connect to receive live bus location updates.
+    Pass ?encoding=msgpack to receive msgpack binary frames instead of JSON text.
     """
     try:
         # Authenticate user
         user = get_user_from_token(token, db)
         
         # Verify user has access to this bus
-        bus = db.query(Bus).filter(Bus.id == bus_id).first()
-        if not bus:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Bus not found"
-            )
-        
-        # Check permissions - passenger needs accepted booking, supervisor needs assigned bus
-        has_access = False
-        
-        if user.role.value == "passenger":
-            # Check if passenger has accepted booking for this bus
-            booking = db.query(Booking).filter(
-                Booking.passenger_id == user.id,
-                Booking.bus_id == bus_id,
-                Booking.status == "accepted"
-            ).first()
-            has_access = booking is not None
-        
-        elif user.role.value == "supervisor":
-            # Check if supervisor is assigned to this bus
-            has_access = bus.supervisor_id == user.id
-        
-        elif user.role.value == "owner":
-            # Owner has access to all their buses
-            has_access = bus.owner_id == user.id
-        
-        if not has_access:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Access denied to bus location"
-            )
+        bus = get_location_bus(user, bus_id, db)
         
         # Connect for bus location updates
-        await manager.connect_bus_location(websocket, bus_id)
+        await manager.connect_bus_location(websocket, bus_id, encoding)
         
         # Send welcome message with current location
         current_location = {
@@ -219,39 +326,34 @@ async def websocket_bus_location(websocket: WebSocket, bus_id: int, token: str,
             "bus_id": bus_id,
             "bus_number": bus.bus_number,
             "route": f"{bus.route_from} - {bus.route_to}",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.utcnow()
         }
         
-        if bus.current_lat and bus.current_lng:
-            current_location.update({
-                "current_location": {
-                    "lat": float(bus.current_lat),
-                    "lng": float(bus.current_lng),
-                    "last_update": bus.last_location_update.isoformat() if bus.last_location_update else None
-                }
-            })
+        last_location = location_snapshot(bus)
+        if last_location:
+            current_location["current_location"] = last_location
         
-        await websocket.send_text(json.dumps(current_location))
+        await manager.send(websocket, current_location)
         
         # Keep connection alive
         while True:
             try:
                 data = await websocket.receive_text()
-                message = json.loads(data)
+                message = orjson.loads(data)
                 
                 if message.get("type") == "ping":
-                    await websocket.send_text(json.dumps({
+                    await manager.send(websocket, {
                         "type": "pong",
-                        "timestamp": datetime.utcnow().isoformat()
-                    }))
+                        "timestamp": datetime.utcnow()
+                    })
                 
             except WebSocketDisconnect:
                 break
-            except json.JSONDecodeError:
-                await websocket.send_text(json.dumps({
+            except orjson.JSONDecodeError:
+                await manager.send(websocket, {
                     "type": "error",
                     "message": "Invalid JSON format"
-                }))
+                })
     
     except HTTPException as e:
         await websocket.close(code=4001, reason=e.detail)
@@ -262,6 +364,90 @@ async def websocket_bus_location(websocket: WebSocket, bus_id: int, token: str,
         await manager.disconnect_bus_location(websocket, bus_id)
 
 
+@router.websocket("/ws/events")
+async def websocket_events(websocket: WebSocket, token: str, encoding: Encoding = "json",
+                           db: Session = Depends(get_db)):
+    """
+    Multiplexed WebSocket endpoint for all of a user's real-time events
+    
+    Carries the booking and ticket events of /ws/booking on one connection.
+    Send {"type": "subscribe", "bus_id": N} to also receive that bus's
+    location_update events (same access rules as /ws/location/{bus_id}).
+    Clients dispatch on each message's "type".
+    """
+    user = None
+    subscribed: Set[int] = set()
+    try:
+        user = get_user_from_token(token, db)
+        await manager.connect_user(websocket, user.id, encoding)
+        
+        await manager.send(websocket, {
+            "type": "connected",
+            "message": f"Connected as {user.name} ({user.role.value})",
+            "user_id": user.id,
+            "timestamp": datetime.utcnow()
+        })
+        
+        while True:
+            try:
+                data = await websocket.receive_text()
+                message = orjson.loads(data)
+                
+                if message.get("type") == "ping":
+                    await manager.send(websocket, {
+                        "type": "pong",
+                        "timestamp": datetime.utcnow()
+                    })
+                
+                elif message.get("type") == "subscribe":
+                    bus_id = int(message["bus_id"])
+                    try:
+                        bus = get_location_bus(user, bus_id, db)
+                    except HTTPException as e:
+                        await manager.send(websocket, {
+                            "type": "error",
+                            "bus_id": bus_id,
+                            "message": e.detail
+                        })
+                        continue
+                    
+                    manager.subscribe_bus(websocket, bus_id)
+                    subscribed.add(bus_id)
+                    reply = {
+                        "type": "subscribed",
+                        "bus_id": bus_id,
+                        "bus_number": bus.bus_number,
+                        "timestamp": datetime.utcnow()
+                    }
+                    last_location = location_snapshot(bus)
+                    if last_location:
+                        reply["current_location"] = last_location
+                    await manager.send(websocket, reply)
+                
+            except WebSocketDisconnect:
+                break
+            except orjson.JSONDecodeError:
+                await manager.send(websocket, {
+                    "type": "error",
+                    "message": "Invalid JSON format"
+                })
+            except Exception as e:
+                await manager.send(websocket, {
+                    "type": "error",
+                    "message": str(e)
+                })
+    
+    except HTTPException as e:
+        await websocket.close(code=4001, reason=e.detail)
+    except Exception as e:
+        await websocket.close(code=4000, reason="Internal server error")
+    finally:
+        if user is not None:
+            await manager.disconnect_user(websocket, user.id)
+        for bus_id in subscribed:
+            await manager.disconnect_bus_location(websocket, bus_id)
+
+
 # Utility functions for sending updates from other parts of the application
 
 async def send_booking_accepted_notification(user_id: int, booking_id: int, bus_details: dict):
@@ -271,7 +457,7 @@ async def send_booking_accepted_notification(user_id: int, booking_id: int, bus_
         "booking_id": booking_id,
         "message": "Your booking request has been accepted!",
         "bus_details": bus_details,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow()
     }
     await manager.send_booking_update(user_id, message)
 
@@ -283,7 +469,7 @@ async def send_booking_rejected_notification(user_id: int, booking_id: int, reas
         "booking_id": booking_id,
         "message": "Your booking request has been rejected.",
         "reason": reason,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow()
     }
     await manager.send_booking_update(user_id, message)
 
@@ -295,12 +481,12 @@ async def send_ticket_confirmed_notification(user_id: int, ticket_id: int, ticke
         "ticket_id": ticket_id,
         "message": "Your ticket has been confirmed!",
         "ticket_details": ticket_details,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow()
     }
     await manager.send_booking_update(user_id, message)
 
 
-async def send_bus_location_update(bus_id: int, lat: float, lng: float):
+async def send_bus_location_update(bus_id: int, lat: float, lng: float, timestamp: Optional[datetime] = None):
     """Send bus location update to all connected clients"""
     message = {
         "type": "location_update",
@@ -308,7 +494,7 @@ async def send_bus_location_update(bus_id: int, lat: float, lng: float):
         "location": {
             "lat": lat,
             "lng": lng,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": timestamp or datetime.utcnow()
         }
     }
     await manager.send_bus_location_update(bus_id, message)
@@ -0,0 +1,91 @@
+"""
+Shared constrained field types for request/response schemas
+Declared once so every model reuses the same constraints
+"""
+
+from enum import Enum
+from functools import lru_cache
+from pathlib import Path
+from typing import Annotated, Any, Callable, Dict, Literal
+
+import orjson
+from pydantic import AfterValidator, BeforeValidator, Field
+
+# OpenAPI examples, keyed by snake_case schema name
+EXAMPLES_PATH = Path(__file__).with_name("examples.json")
+
+
+def _check_phone(v: str) -> str:
+    """Optional leading "+", then 10-15 ASCII digits"""
+    digits = v[1:] if v.startswith("+") else v
+    if not (10 <= len(digits) <= 15 and digits.isascii() and digits.isdigit()):
+        raise ValueError("Phone must be 10-15 digits, optionally prefixed with +")
+    return v
+
+
+# Phone number: optional leading "+", 10-15 digits
+PhoneStr = Annotated[str, AfterValidator(_check_phone)]
+
+# Person / place names
+Name100 = Annotated[str, Field(min_length=2, max_length=100)]
+
+# WGS84 coordinates
+Lat = Annotated[float, Field(ge=-90, le=90)]
+Lng = Annotated[float, Field(ge=-180, le=180)]
+
+# Positive integer (record IDs, counts, ordering) sent by clients
+# Lax on purpose: the supervisor app posts booking IDs as strings ("12")
+PosInt = Annotated[int, Field(gt=0)]
+
+# Record ID in responses (always an int straight from the database)
+Id = Annotated[int, Field(ge=0, strict=True)]
+
+# Free-text reason for rejecting / cancelling
+Reason = Annotated[str, Field(max_length=500)]
+
+
+def _enum_value(v: Any) -> Any:
+    """Unwrap ORM enum members so they validate against a Literal"""
+    return v.value if isinstance(v, Enum) else v
+
+
+# Response-side status/type values (same values as the Enums)
+BookingStatusLit = Annotated[
+    Literal["pending", "accepted", "rejected", "cancelled"],
+    BeforeValidator(_enum_value),
+]
+TicketStatusLit = Annotated[
+    Literal["confirmed", "completed", "cancelled"],
+    BeforeValidator(_enum_value),
+]
+BusTypeLit = Annotated[
+    Literal["AC", "Non-AC", "AC Sleeper"],
+    BeforeValidator(_enum_value),
+]
+UserRoleLit = Annotated[
+    Literal["passenger", "supervisor", "owner"],
+    BeforeValidator(_enum_value),
+]
+
+
+def title_case(v: str) -> str:
+    """Strip and title-case a name, skipping the copy if already title-cased"""
+    v = v.strip()
+    return v if v.istitle() else v.title()
+
+
+@lru_cache(maxsize=1)
+def _examples() -> Dict[str, Any]:
+    return orjson.loads(EXAMPLES_PATH.read_bytes())
+
+
+def lazy_example(key: str) -> Callable[[Dict[str, Any]], None]:
+    """
+    json_schema_extra hook that attaches examples.json[key]
+    The file is only read when the OpenAPI schema is generated
+    """
+
+    def add_example(schema: Dict[str, Any]) -> None:
+        schema.setdefault("example", _examples()[key])
+
+    return add_example
@@ -1,8 +1,10 @@
-from pydantic import BaseModel, Field, field_validator
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict
+from typing import List
 from datetime import datetime
 from enum import Enum
-from decimal import Decimal
+
+from app.schemas._common import BookingStatusLit, Id, PosInt, Reason, lazy_example
+from app.schemas.bus import BoardingPointBasic
 
 
 class BookingStatus(str, Enum):
@@ -16,154 +18,107 @@ class BookingStatus(str, Enum):
 # Request Schemas
 class BookingRequestCreate(BaseModel):
     """Schema for creating a booking request"""
-    bus_id: int = Field(..., gt=0)
+    bus_id: PosInt
+
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra=lazy_example("booking_request_create"),
+    )
+
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "bus_id": 1
-            }
-        }
+class ReasonBody(BaseModel):
+    """Optional reason sent when rejecting / cancelling"""
+    reason: Reason | None = None
+
+    model_config = ConfigDict(extra="forbid")
 
 
 class BookingAcceptRequest(BaseModel):
-    """Schema for accepting a booking"""
-    booking_id: int = Field(..., gt=0)
+    """Schema for accepting a booking (legacy body form)"""
+    booking_id: PosInt
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "booking_id": 1
-            }
-        }
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra=lazy_example("booking_accept_request"),
+    )
 
 
-class BookingRejectRequest(BaseModel):
-    """Schema for rejecting a booking"""
-    booking_id: int = Field(..., gt=0)
-    reason: Optional[str] = Field(None, max_length=500)
+class BookingRejectRequest(ReasonBody):
+    """Schema for rejecting a booking (legacy body form)"""
+    booking_id: PosInt
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "booking_id": 1,
-                "reason": "No seats available"
-            }
-        }
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra=lazy_example("booking_reject_request"),
+    )
 
 
-class BookingCancelRequest(BaseModel):
-    """Schema for cancelling a booking"""
-    booking_id: int = Field(..., gt=0)
-    reason: Optional[str] = Field(None, max_length=500)
+class BookingCancelRequest(ReasonBody):
+    """Schema for cancelling a booking (legacy body form)"""
+    booking_id: PosInt
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "booking_id": 1,
-                "reason": "Change of plans"
-            }
-        }
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra=lazy_example("booking_cancel_request"),
+    )
 
 
 # Response Schemas
 class BookingBasicResponse(BaseModel):
     """Basic booking info for supervisor requests list"""
-    id: int
-    bus_id: int
-    status: BookingStatus
+    id: Id
+    bus_id: Id
+    status: BookingStatusLit
     request_time: datetime
 
-    class Config:
-        from_attributes = True
-        json_schema_extra = {
-            "example": {
-                "id": 1,
-                "bus_id": 1,
-                "status": "pending",
-                "request_time": "2025-10-11T10:00:00"
-            }
-        }
+    model_config = ConfigDict(
+        from_attributes=True,
+        frozen=True,
+        json_schema_extra=lazy_example("booking_basic_response"),
+    )
 
 
-class BookingDetailedResponse(BaseModel):
+class BookingDetailedResponse(BookingBasicResponse):
     """Detailed booking info shown after acceptance"""
-    id: int
-    bus_id: int
-    passenger_id: int
+    passenger_id: Id
     passenger_name: str
     passenger_phone: str
-    status: BookingStatus
-    request_time: datetime
-    accepted_time: Optional[datetime] = None
-    rejected_time: Optional[datetime] = None
-    cancelled_time: Optional[datetime] = None
-    rejection_reason: Optional[str] = None
-    cancellation_reason: Optional[str] = None
+    accepted_time: datetime | None = None
+    rejected_time: datetime | None = None
+    cancelled_time: datetime | None = None
+    rejection_reason: str | None = None
+    cancellation_reason: str | None = None
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
-        json_schema_extra = {
-            "example": {
-                "id": 1,
-                "bus_id": 1,
-                "passenger_id": 5,
-                "passenger_name": "John Doe",
-                "passenger_phone": "+8801712345678",
-                "status": "accepted",
-                "request_time": "2025-10-11T10:00:00",
-                "accepted_time": "2025-10-11T10:05:00",
-                "rejected_time": None,
-                "cancelled_time": None,
-                "rejection_reason": None,
-                "cancellation_reason": None,
-                "created_at": "2025-10-11T10:00:00",
-                "updated_at": "2025-10-11T10:05:00"
-            }
-        }
+    model_config = ConfigDict(
+        from_attributes=True,
+        frozen=True,
+        json_schema_extra=lazy_example("booking_detailed_response"),
+    )
 
 
 class BookingAcceptanceResponse(BaseModel):
     """Response after accepting a booking"""
-    booking_id: int
-    status: BookingStatus
+    booking_id: Id
+    status: BookingStatusLit
     passenger_name: str
     passenger_phone: str
-    available_boarding_points: List[dict]  # Will be populated by the endpoint
-
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "booking_id": 1,
-                "status": "accepted",
-                "passenger_name": "John Doe",
-                "passenger_phone": "+8801712345678",
-                "available_boarding_points": [
-                    {
-                        "id": 1,
-                        "name": "Mohakhali Bus Stand",
-                        "lat": 23.7808,
-                        "lng": 90.4044,
-                        "sequence_order": 1
-                    }
-                ]
-            }
-        }
+    available_boarding_points: List[BoardingPointBasic]
+
+    model_config = ConfigDict(
+        frozen=True,
+        json_schema_extra=lazy_example("booking_acceptance_response"),
+    )
 
 
 class BookingStatusResponse(BaseModel):
     """Simple status response"""
-    booking_id: int
-    status: BookingStatus
+    booking_id: Id
+    status: BookingStatusLit
     message: str
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "booking_id": 1,
-                "status": "accepted",
-                "message": "Booking accepted successfully"
-            }
-        }
+    model_config = ConfigDict(
+        frozen=True,
+        json_schema_extra=lazy_example("booking_status_response"),
+    )
@@ -1,8 +1,17 @@
-from pydantic import BaseModel, Field, field_validator
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import List
 from datetime import datetime
-from decimal import Decimal
 from enum import Enum
+import time
+
+from app.schemas._common import (
+    BusTypeLit,
+    Id,
+    Name100,
+    PosInt,
+    lazy_example,
+    title_case,
+)
 
 
 class BusType(str, Enum):
@@ -16,268 +25,186 @@ class BusType(str, Enum):
 class BusCreate(BaseModel):
     """Schema for creating a new bus"""
     bus_number: str = Field(..., min_length=3, max_length=20)
-    route_from: str = Field(..., min_length=2, max_length=100)
-    route_to: str = Field(..., min_length=2, max_length=100)
+    route_from: Name100
+    route_to: Name100
     departure_time: datetime
     bus_type: BusType
-    fare: Decimal = Field(..., gt=0)
+    fare: float = Field(..., gt=0)
     seat_capacity: int = Field(..., gt=0, le=100)
-    supervisor_id: Optional[int] = None
+    supervisor_id: PosInt | None = None
 
     @field_validator('route_from', 'route_to')
     @classmethod
     def validate_route(cls, v: str) -> str:
         """Ensure route names are properly formatted"""
-        return v.strip().title()
+        return title_case(v)
 
     @field_validator('departure_time')
     @classmethod
     def validate_departure_time(cls, v: datetime) -> datetime:
         """Ensure departure time is in the future"""
-        if v < datetime.now():
+        # Naive values are local time, aware values carry their own offset
+        if v.timestamp() < time.time():
             raise ValueError('Departure time must be in the future')
         return v
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "bus_number": "DHA-1234",
-                "route_from": "Dhaka",
-                "route_to": "Chittagong",
-                "departure_time": "2025-10-20T08:00:00",
-                "bus_type": "AC",
-                "fare": 850.00,
-                "seat_capacity": 40,
-                "supervisor_id": 2
-            }
-        }
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra=lazy_example("bus_create"),
+    )
 
 
 class BusUpdate(BaseModel):
     """Schema for updating bus information (partial update)"""
-    bus_number: Optional[str] = Field(None, min_length=3, max_length=20)
-    route_from: Optional[str] = Field(None, min_length=2, max_length=100)
-    route_to: Optional[str] = Field(None, min_length=2, max_length=100)
-    departure_time: Optional[datetime] = None
-    bus_type: Optional[BusType] = None
-    fare: Optional[Decimal] = Field(None, gt=0)
-    seat_capacity: Optional[int] = Field(None, gt=0, le=100)
-    supervisor_id: Optional[int] = None
-    is_active: Optional[bool] = None
+    bus_number: str | None = Field(None, min_length=3, max_length=20)
+    route_from: Name100 | None = None
+    route_to: Name100 | None = None
+    departure_time: datetime | None = None
+    bus_type: BusType | None = None
+    fare: float | None = Field(None, gt=0)
+    seat_capacity: int | None = Field(None, gt=0, le=100)
+    supervisor_id: PosInt | None = None
+    is_active: bool | None = None
 
     @field_validator('route_from', 'route_to')
     @classmethod
-    def validate_route(cls, v: Optional[str]) -> Optional[str]:
+    def validate_route(cls, v: str | None) -> str | None:
         """Ensure route names are properly formatted"""
         if v:
-            return v.strip().title()
+            return title_case(v)
         return v
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "fare": 900.00,
-                "supervisor_id": 3
-            }
-        }
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra=lazy_example("bus_update"),
+    )
 
 
 class BusSearchFilters(BaseModel):
     """Query parameters for searching buses"""
-    route_from: Optional[str] = None
-    route_to: Optional[str] = None
-    bus_type: Optional[BusType] = None
-    min_fare: Optional[Decimal] = Field(None, ge=0)
-    max_fare: Optional[Decimal] = Field(None, ge=0)
-    min_seats: Optional[int] = Field(None, ge=1)
-    date: Optional[datetime] = None  # Filter by departure date
-    sort_by: Optional[str] = Field(default="departure_time", pattern="^(fare|departure_time)$")
-    order: Optional[str] = Field(default="asc", pattern="^(asc|desc)$")
-
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "route_from": "Dhaka",
-                "route_to": "Chittagong",
-                "bus_type": "AC",
-                "min_fare": 500,
-                "max_fare": 1000,
-                "min_seats": 10,
-                "sort_by": "fare",
-                "order": "asc"
-            }
-        }
+    route_from: str | None = None
+    route_to: str | None = None
+    bus_type: BusType | None = None
+    min_fare: float | None = Field(None, ge=0)
+    max_fare: float | None = Field(None, ge=0)
+    min_seats: int | None = Field(None, ge=1)
+    date: datetime | None = None  # Filter by departure date
+    sort_by: str | None = Field(
+        default="departure_time", pattern="^(fare|departure_time)$"
+    )
+    order: str | None = Field(default="asc", pattern="^(asc|desc)$")
+
+    # frozen: validated instances are cached and shared across requests
+    model_config = ConfigDict(
+        extra="forbid",
+        frozen=True,
+        json_schema_extra=lazy_example("bus_search_filters"),
+    )
 
 
 # Response Schemas
-class BusPublicResponse(BaseModel):
-    """
-    Public bus information (for search results)
-    Does NOT include supervisor contact or exact location
-    """
-    id: int
+class BusBase(BaseModel):
+    """Fields shared by every bus response"""
+    id: Id
     bus_number: str
     route_from: str
     route_to: str
     departure_time: datetime
-    bus_type: BusType
-    fare: Decimal
-   
+    bus_type: BusTypeLit
+    fare: float
     is_active: bool
 
-    class Config:
-        from_attributes = True
-        json_schema_extra = {
-            "example": {
-                "id": 1,
-                "bus_number": "DHA-1234",
-                "route_from": "Dhaka",
-                "route_to": "Chittagong",
-                "departure_time": "2025-10-20T08:00:00",
-                "bus_type": "AC",
-                "fare": 850.00,
-                "available_seats": 35,
-                "is_active": True
-            }
-        }
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
+class BusPublicResponse(BusBase):
+    """
+    Public bus information (for search results)
+    Does NOT include supervisor contact or exact location
+    """
+    available_seats: int
+
+    model_config = ConfigDict(
+        from_attributes=True,
+        frozen=True,
+        json_schema_extra=lazy_example("bus_public_response"),
+    )
 
 
 class BoardingPointBasic(BaseModel):
     """Basic boarding point info for bus details"""
-    id: int
+    id: Id
     name: str
-    lat: Decimal
-    lng: Decimal
+    lat: float
+    lng: float
     sequence_order: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
+class BusSummary(BaseModel):
+    """Route and departure summary shown on a confirmed ticket"""
+    bus_number: str
+    route_from: str
+    route_to: str
+    departure_time: datetime
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
+class AssignedBus(BusSummary):
+    """Bus assigned to a supervisor (returned on login)"""
+    id: Id
 
 
 class SupervisorBasic(BaseModel):
     """Basic supervisor info (only shown after booking acceptance)"""
-    id: int
+    id: Id
     name: str
     phone: str
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
-class BusDetailedResponse(BaseModel):
+class BusDetailedResponse(BusBase):
     """
     Detailed bus information (shown after booking acceptance)
     Includes supervisor contact and boarding points
     """
-    id: int
-    bus_number: str
-    route_from: str
-    route_to: str
-    departure_time: datetime
-    bus_type: BusType
-    fare: Decimal
     seat_capacity: int
     available_seats: int
-    owner_id: int
-    supervisor: Optional[SupervisorBasic] = None
+    owner_id: Id
+    supervisor: SupervisorBasic | None = None
     boarding_points: List[BoardingPointBasic] = []
-    current_lat: Optional[Decimal] = None
-    current_lng: Optional[Decimal] = None
-    last_location_update: Optional[datetime] = None
-    is_active: bool
+    current_lat: float | None = None
+    current_lng: float | None = None
+    last_location_update: datetime | None = None
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
-        json_schema_extra = {
-            "example": {
-                "id": 1,
-                "bus_number": "DHA-1234",
-                "route_from": "Dhaka",
-                "route_to": "Chittagong",
-                "departure_time": "2025-10-20T08:00:00",
-                "bus_type": "AC",
-                "fare": 850.00,
-                "seat_capacity": 40,
-                "available_seats": 35,
-                "owner_id": 1,
-                "supervisor": {
-                    "id": 2,
-                    "name": "John Supervisor",
-                    "phone": "+8801812345678"
-                },
-                "boarding_points": [
-                    {
-                        "id": 1,
-                        "name": "Mohakhali",
-                        "lat": 23.7808,
-                        "lng": 90.4044,
-                        "sequence_order": 1
-                    },
-                    {
-                        "id": 2,
-                        "name": "Comilla",
-                        "lat": 23.4607,
-                        "lng": 91.1809,
-                        "sequence_order": 2
-                    }
-                ],
-                "current_lat": None,
-                "current_lng": None,
-                "last_location_update": None,
-                "is_active": True,
-                "created_at": "2025-10-11T10:00:00",
-                "updated_at": "2025-10-11T10:00:00"
-            }
-        }
-
-
-class BusOwnerResponse(BaseModel):
+    model_config = ConfigDict(
+        from_attributes=True,
+        frozen=True,
+        json_schema_extra=lazy_example("bus_detailed_response"),
+    )
+
+
+class BusOwnerResponse(BusBase):
     """
     Bus information for owner dashboard
     Includes all details for management
     """
-    id: int
-    bus_number: str
-    route_from: str
-    route_to: str
-    departure_time: datetime
-    bus_type: BusType
-    fare: Decimal
     seat_capacity: int
     available_seats: int
-    supervisor_id: Optional[int] = None
-    supervisor: Optional[SupervisorBasic] = None
+    supervisor_id: Id | None = None
+    supervisor: SupervisorBasic | None = None
     boarding_points_count: int = 0
     total_bookings: int = 0
-    is_active: bool
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
-        json_schema_extra = {
-            "example": {
-                "id": 1,
-                "bus_number": "DHA-1234",
-                "route_from": "Dhaka",
-                "route_to": "Chittagong",
-                "departure_time": "2025-10-20T08:00:00",
-                "bus_type": "AC",
-                "fare": 850.00,
-                "seat_capacity": 40,
-                "available_seats": 35,
-                "supervisor_id": 2,
-                "supervisor": {
-                    "id": 2,
-                    "name": "John Supervisor",
-                    "phone": "+8801812345678"
-                },
-                "boarding_points_count": 3,
-                "total_bookings": 5,
-                "is_active": True,
-                "created_at": "2025-10-11T10:00:00",
-                "updated_at": "2025-10-11T10:00:00"
-            }
-        }
+    model_config = ConfigDict(
+        from_attributes=True,
+        frozen=True,
+        json_schema_extra=lazy_example("bus_owner_response"),
+    )
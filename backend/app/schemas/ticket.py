@@ -1,8 +1,10 @@
-from pydantic import BaseModel, Field, field_validator
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from enum import Enum
-from decimal import Decimal
+
+from app.schemas._common import Id, PosInt, TicketStatusLit, lazy_example
+from app.schemas.booking import ReasonBody
+from app.schemas.bus import BoardingPointBasic, BusSummary
 
 
 class TicketStatus(str, Enum):
@@ -15,128 +17,78 @@ class TicketStatus(str, Enum):
 # Request Schemas
 class TicketConfirmRequest(BaseModel):
     """Schema for confirming ticket details"""
-    booking_id: int = Field(..., gt=0)
-    boarding_point_id: int = Field(..., gt=0)
+    booking_id: PosInt
+    boarding_point_id: PosInt
     seats_booked: int = Field(..., gt=0, le=10)  # Max 10 seats per booking
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "booking_id": 1,
-                "boarding_point_id": 1,
-                "seats_booked": 2
-            }
-        }
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra=lazy_example("ticket_confirm_request"),
+    )
 
 
-class TicketCancelRequest(BaseModel):
-    """Schema for cancelling a ticket"""
-    ticket_id: int = Field(..., gt=0)
-    reason: Optional[str] = Field(None, max_length=500)
+class TicketCancelRequest(ReasonBody):
+    """Schema for cancelling a ticket (legacy body form)"""
+    ticket_id: PosInt
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "ticket_id": 1,
-                "reason": "Change of plans"
-            }
-        }
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra=lazy_example("ticket_cancel_request"),
+    )
 
 
 # Response Schemas
 class TicketResponse(BaseModel):
     """Schema for ticket in responses"""
-    id: int
-    booking_id: int
-    boarding_point_id: int
+    id: Id
+    booking_id: Id
+    boarding_point_id: Id
     boarding_point_name: str
-    boarding_point_lat: Decimal
-    boarding_point_lng: Decimal
+    boarding_point_lat: float
+    boarding_point_lng: float
     boarding_point_sequence: int
     seats_booked: int
-    fare_per_seat: Decimal
-    total_fare: Decimal
-    status: TicketStatus
+    fare_per_seat: float
+    total_fare: float
+    status: TicketStatusLit
     bus_number: str
     route_from: str
     route_to: str
     departure_time: datetime
     created_at: datetime
-    completed_at: Optional[datetime] = None
-    cancelled_at: Optional[datetime] = None
-
-    class Config:
-        from_attributes = True
-        json_schema_extra = {
-            "example": {
-                "id": 1,
-                "booking_id": 1,
-                "boarding_point_id": 1,
-                "boarding_point_name": "Mohakhali Bus Stand",
-                "boarding_point_lat": 23.7808,
-                "boarding_point_lng": 90.4044,
-                "boarding_point_sequence": 1,
-                "seats_booked": 2,
-                "fare_per_seat": 850.00,
-                "total_fare": 1700.00,
-                "status": "confirmed",
-                "bus_number": "DHA-1234",
-                "route_from": "Dhaka",
-                "route_to": "Chittagong",
-                "departure_time": "2025-10-20T08:00:00",
-                "created_at": "2025-10-11T10:00:00",
-                "completed_at": None,
-                "cancelled_at": None
-            }
-        }
+    completed_at: datetime | None = None
+    cancelled_at: datetime | None = None
+
+    model_config = ConfigDict(
+        from_attributes=True,
+        frozen=True,
+        json_schema_extra=lazy_example("ticket_response"),
+    )
 
 
 class TicketConfirmResponse(BaseModel):
     """Response after confirming ticket"""
-    ticket_id: int
-    status: TicketStatus
+    ticket_id: Id
+    status: TicketStatusLit
     seats_booked: int
-    total_fare: Decimal
-    boarding_point: dict
-    bus_details: dict
+    total_fare: float
+    boarding_point: BoardingPointBasic
+    bus_details: BusSummary
     message: str
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "ticket_id": 1,
-                "status": "confirmed",
-                "seats_booked": 2,
-                "total_fare": 1700.00,
-                "boarding_point": {
-                    "id": 1,
-                    "name": "Mohakhali Bus Stand",
-                    "lat": 23.7808,
-                    "lng": 90.4044,
-                    "sequence_order": 1
-                },
-                "bus_details": {
-                    "bus_number": "DHA-1234",
-                    "route_from": "Dhaka",
-                    "route_to": "Chittagong",
-                    "departure_time": "2025-10-20T08:00:00"
-                },
-                "message": "Ticket confirmed successfully"
-            }
-        }
+    model_config = ConfigDict(
+        frozen=True,
+        json_schema_extra=lazy_example("ticket_confirm_response"),
+    )
 
 
 class TicketStatusResponse(BaseModel):
     """Simple ticket status response"""
-    ticket_id: int
-    status: TicketStatus
+    ticket_id: Id
+    status: TicketStatusLit
     message: str
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "ticket_id": 1,
-                "status": "cancelled",
-                "message": "Ticket cancelled successfully"
-            }
-        }
+    model_config = ConfigDict(
+        frozen=True,
+        json_schema_extra=lazy_example("ticket_status_response"),
+    )
@@ -1,8 +1,14 @@
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import List
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+from app.schemas._common import Id, Name100, PhoneStr, UserRoleLit, lazy_example
+from app.schemas.bus import AssignedBus
+
+# Characters dropped from phone numbers in one str.translate pass
+_PHONE_STRIP = str.maketrans("", "", " -")
 
 
 class UserRole(str, Enum):
@@ -17,8 +23,8 @@ class UserRole(str, Enum):
 class UserRegister(BaseModel):
     """Schema for user registration"""
 
-    name: str = Field(..., min_length=2, max_length=100)
-    phone: str = Field(..., pattern=r"^\+?[0-9]{10,15}$")
+    name: Name100
+    phone: PhoneStr
     password: str = Field(..., min_length=8, max_length=100)
     nid: str = Field(..., min_length=10, max_length=20)
     role: UserRole = Field(default=UserRole.PASSENGER)
@@ -28,78 +34,64 @@ class UserRegister(BaseModel):
     def validate_phone(cls, v: str) -> str:
         """Ensure phone number is clean"""
         # Remove any spaces or dashes
-        return v.replace(" ", "").replace("-", "")
+        return v.translate(_PHONE_STRIP)
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "name": "John Doe",
-                "phone": "+8801712345678",
-                "password": "SecurePass123",
-                "nid": "1234567890123",
-                "role": "passenger",
-            }
-        }
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra=lazy_example("user_register"),
+    )
 
 
 class UserLogin(BaseModel):
     """Schema for user login"""
 
-    phone: str = Field(..., pattern=r"^\+?[0-9]{10,15}$")
+    phone: PhoneStr
     password: str = Field(..., min_length=8)
 
-    class Config:
-        json_schema_extra = {
-            "example": {"phone": "+8801712345678", "password": "SecurePass123"}
-        }
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra=lazy_example("user_login"),
+    )
 
 
 class UserUpdate(BaseModel):
     """Schema for updating user profile"""
 
-    name: Optional[str] = Field(None, min_length=2, max_length=100)
-    phone: Optional[str] = Field(None, pattern=r"^\+?[0-9]{10,15}$")
-    password: Optional[str] = Field(None, min_length=8, max_length=100)
+    name: Name100 | None = None
+    phone: PhoneStr | None = None
+    password: str | None = Field(None, min_length=8, max_length=100)
 
     @field_validator("phone")
     @classmethod
-    def validate_phone(cls, v: Optional[str]) -> Optional[str]:
+    def validate_phone(cls, v: str | None) -> str | None:
         """Ensure phone number is clean"""
         if v:
-            return v.replace(" ", "").replace("-", "")
+            return v.translate(_PHONE_STRIP)
         return v
 
-    class Config:
-        json_schema_extra = {
-            "example": {"name": "John Updated", "phone": "+8801712345679"}
-        }
+    model_config = ConfigDict(
+        extra="forbid",
+        json_schema_extra=lazy_example("user_update"),
+    )
 
 
 # Response Schemas
 class UserResponse(BaseModel):
     """Schema for user data in responses (NO NID, NO password)"""
 
-    id: int
+    id: Id
     name: str
     phone: str
-    role: UserRole
+    role: UserRoleLit
     is_active: bool
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
-        json_schema_extra = {
-            "example": {
-                "id": 1,
-                "name": "John Doe",
-                "phone": "+8801712345678",
-                "role": "passenger",
-                "is_active": True,
-                "created_at": "2025-10-01T10:00:00",
-                "updated_at": "2025-10-01T10:00:00",
-            }
-        }
+    model_config = ConfigDict(
+        from_attributes=True,
+        frozen=True,
+        json_schema_extra=lazy_example("user_response"),
+    )
 
 
 class TokenResponse(BaseModel):
@@ -108,29 +100,20 @@ class TokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
     user: UserResponse
-    assigned_buses: Optional[List[Dict[str, Any]]] = None  # ← ADD THIS LINE
-
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "access_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
-                "token_type": "bearer",
-                "user": {
-                    "id": 1,
-                    "name": "John Doe",
-                    "phone": "+8801712345678",
-                    "role": "passenger",
-                    "is_active": True,
-                    "created_at": "2025-10-01T10:00:00",
-                    "updated_at": "2025-10-01T10:00:00",
-                },
-            }
-        }
+    assigned_buses: List[AssignedBus] | None = None
+
+    model_config = ConfigDict(
+        frozen=True,
+        json_schema_extra=lazy_example("token_response"),
+    )
 
 
 class TokenData(BaseModel):
     """Schema for data stored in JWT token"""
 
-    user_id: int
+    user_id: Id
     phone: str
-    role: UserRole
+    role: UserRoleLit
+
+    model_config = ConfigDict(frozen=True)
+
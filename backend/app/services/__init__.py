@@ -1,3 +1,5 @@
+from .location_batcher import location_batcher
 from .maps_service import maps_service
+from .revenue_view import revenue_view_refresher
 
-__all__ = ["maps_service"]
+__all__ = ["location_batcher", "maps_service", "revenue_view_refresher"]
@@ -0,0 +1,103 @@
+"""
+Batched bus location updates
+Coalesces supervisor GPS updates per bus and flushes them to the
+database and WebSocket subscribers on a fixed interval
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import update
+
+from app.database import SessionLocal
+from app.models.bus import Bus
+from app.routers.websocket import send_bus_location_update
+
+logger = logging.getLogger(__name__)
+
+# How often queued location updates are written and broadcast (seconds)
+FLUSH_INTERVAL = 0.2
+
+
+class LocationBatcher:
+    """
+    In-process queue for bus location updates.
+    Only the latest update per bus within a flush window is kept, so the
+    database write rate is bounded regardless of the GPS sample rate.
+    """
+
+    def __init__(self, flush_interval: float = FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the background flush loop (call from app startup)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the flush loop and write out anything still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def submit(self, bus_id: int, lat: float, lng: float, timestamp: datetime):
+        """Queue a location update without waiting for DB or broadcast"""
+        self.queue.put_nowait((bus_id, lat, lng, timestamp))
+
+    async def flush(self):
+        """Persist and broadcast the latest queued update for each bus"""
+        latest: Dict[int, Tuple[float, float, datetime]] = {}
+        while not self.queue.empty():
+            bus_id, lat, lng, timestamp = self.queue.get_nowait()
+            latest[bus_id] = (lat, lng, timestamp)
+
+        if not latest:
+            return
+
+        await asyncio.to_thread(self._persist, latest)
+
+        for bus_id, (lat, lng, timestamp) in latest.items():
+            await send_bus_location_update(bus_id, lat, lng, timestamp)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Location flush error")
+
+    @staticmethod
+    def _persist(latest: Dict[int, Tuple[float, float, datetime]]):
+        """Write all coalesced locations in one executemany UPDATE"""
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(Bus),
+                [
+                    {
+                        "id": bus_id,
+                        "current_lat": Decimal(str(lat)),
+                        "current_lng": Decimal(str(lng)),
+                        "last_location_update": timestamp,
+                    }
+                    for bus_id, (lat, lng, timestamp) in latest.items()
+                ],
+            )
+            db.commit()
+        finally:
+            db.close()
+
+
+# Singleton instance
+location_batcher = LocationBatcher()
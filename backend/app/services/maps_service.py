@@ -4,14 +4,425 @@ Replaces Google Maps with free OSM APIs
 No API key required, no live traffic data
 """
 
+import asyncio
+import logging
+from abc import ABC, abstractmethod
 import math
-from datetime import datetime
-from typing import Dict, List, Optional
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
+import numpy as np
+import orjson
+
+try:
+    from numba import njit
+except ImportError:  # optional: bulk distances fall back to NumPy
+    njit = None
+
+from app.cache import (
+    MAPS_CACHE_TTL,
+    MAPS_REVALIDATE_TTL,
+    cache,
+    geocode_key,
+    nearby_key,
+    reverse_geocode_key,
+    route_key,
+)
+
+logger = logging.getLogger(__name__)
+
+# Nearby places returned to clients, and how many candidates Overpass may
+# return for us to pick them from
+NEARBY_LIMIT = 20
+OVERPASS_MAX_RESULTS = 200
+
+# Read size when streaming Overpass response bodies (bytes)
+OVERPASS_CHUNK_SIZE = 65536
+
+# Common nearby-place types mapped to OSM tags (others become amenity=<type>)
+PLACE_TYPE_TAGS = {
+    "restaurant": "amenity=restaurant",
+    "hospital": "amenity=hospital",
+    "atm": "amenity=atm",
+    "pharmacy": "amenity=pharmacy",
+    "fuel": "amenity=fuel",
+    "hotel": "tourism=hotel",
+}
+
+# Overpass QL for nodes/ways with a tag around a point
+OVERPASS_NEARBY_QUERY = (
+    "[out:json];"
+    "(node[{tag}](around:{radius},{lat},{lng});"
+    "way[{tag}](around:{radius},{lat},{lng}););"
+    "out center {limit};"
+)
+
+# Concurrent Nominatim lookups in geocode_batch. The public instance allows
+# about 1 request/second, so bulk geocoding belongs on a self-hosted server
+NOMINATIM_CONCURRENCY = 5
+
+# Attempts for calls answered with 429/503, waiting 1 s, 2 s, ... in between
+RETRY_ATTEMPTS = 3
+RETRY_STATUSES = (429, 503)
+
+# Background refresh of popular lookups: every REFRESH_INTERVAL seconds the
+# REFRESH_TOP_N most requested cache entries that go stale within
+# REFRESH_WINDOW are fetched again, so users don't wait on a cold cache
+REFRESH_INTERVAL = 60
+REFRESH_TOP_N = 100
+REFRESH_WINDOW = MAPS_CACHE_TTL // 10
+REFRESH_CONCURRENCY = 5
+
+# Most cache keys whose request counts are tracked for refreshing
+HOT_KEYS_MAX = 10000
+
+# How often request counts are halved (seconds). Much longer than
+# REFRESH_INTERVAL so lookups made a few times an hour still rank as hot
+HOT_KEYS_DECAY_INTERVAL = 6 * 3600
+
+
+def _haversine_km(lat, lng, lats, lngs, out):
+    """Haversine from (lat, lng) to each point, written into out (km)"""
+    R = 6371.0  # Earth's radius in km
+    lat_rad = math.radians(lat)
+    cos_lat = math.cos(lat_rad)
+    for i in range(lats.shape[0]):
+        lat2_rad = math.radians(lats[i])
+        sin_half_dlat = math.sin((lat2_rad - lat_rad) / 2)
+        sin_half_dlng = math.sin(math.radians(lngs[i] - lng) / 2)
+        a = (
+            sin_half_dlat * sin_half_dlat
+            + cos_lat * math.cos(lat2_rad) * sin_half_dlng * sin_half_dlng
+        )
+        out[i] = 2 * R * math.asin(math.sqrt(min(a, 1.0)))
+
+
+# Compiled to a tight native loop (no NumPy temporaries) when numba is
+# installed; cache=True keeps the compiled kernel across restarts
+if njit is not None:
+    _haversine_km = njit(fastmath=True, cache=True)(_haversine_km)
+
+
+def _json(response: httpx.Response):
+    """Parse a response body with orjson (faster than response.json())"""
+    return orjson.loads(response.content)
+
+
+# Cached lookups are stored as {"data", "etag", "last_modified",
+# "fresh_until"}. Past fresh_until a GET lookup is revalidated with a
+# conditional request, and a 304 reuses the cached data without a body
+def _is_fresh(entry: Optional[Dict]) -> bool:
+    return entry is not None and entry["fresh_until"] > time.time()
+
+
+def _conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+    """If-None-Match / If-Modified-Since for a stale cached entry"""
+    headers = {}
+    if entry is not None:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
 
+async def _store_entry(key: str, entry: Dict):
+    # Without validators a stale entry can't be revalidated, so drop it
+    can_revalidate = entry["etag"] or entry["last_modified"]
+    ttl = MAPS_REVALIDATE_TTL if can_revalidate else MAPS_CACHE_TTL
+    await cache.aset(key, entry, ttl)
 
-class MapsService:
+
+async def _cache_data(
+    key: str, data: Any, response: Optional[httpx.Response] = None
+) -> Any:
+    """Cache parsed data (with the response's validators), return the data"""
+    headers = response.headers if response is not None else {}
+    entry = {
+        "data": data,
+        "etag": headers.get("etag"),
+        "last_modified": headers.get("last-modified"),
+        "fresh_until": time.time() + MAPS_CACHE_TTL,
+    }
+    await _store_entry(key, entry)
+    return data
+
+
+async def _revalidated(key: str, entry: Dict) -> Any:
+    """Mark a cached entry fresh again after a 304, return its data"""
+    entry["fresh_until"] = time.time() + MAPS_CACHE_TTL
+    await _store_entry(key, entry)
+    return entry["data"]
+
+
+class BaseMapsService(ABC):
+    """
+    Provider-independent parts of the location service: shared HTTP client,
+    rate-limit backoff, distance math, ETA and the cache refresher
+    Providers implement the lookups (geocoding, routing, nearby places)
+    """
+
+    def __init__(self, headers: Dict[str, str]):
+        self.headers = headers
+
+        # Shared pooled client so TCP/TLS connections to the provider
+        # are reused across requests (closed from the app lifespan).
+        # HTTP/2 lets concurrent calls to the same host share one connection
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            http2=True,
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        )
+
+        # Request counts per cache key, and the (method name, args) that
+        # fetches each one, for the background refresher
+        self._hits: Counter = Counter()
+        self._lookups: Dict[str, Tuple[str, tuple]] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._last_decay = time.monotonic()
+
+    def warm_up(self):
+        """Compile the numba distance kernel at startup, off the request path"""
+        self.calculate_distances_batch(0.0, 0.0, [0.0], [0.0])
+
+    def start(self):
+        """Start the background cache refresher (call from app startup)"""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def aclose(self):
+        """Stop the refresher and close the shared HTTP client (app shutdown)"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        await self.client.aclose()
+
+    def _track(self, key: str, method: str, *args):
+        """Count a lookup so popular ones are kept warm"""
+        self._hits[key] += 1
+        self._lookups[key] = (method, args)
+        if len(self._lookups) > HOT_KEYS_MAX:
+            self._decay_hits()
+
+    def _decay_hits(self):
+        """Halve request counts, keeping at most half of HOT_KEYS_MAX keys"""
+        hits = Counter()
+        for key, count in self._hits.most_common(HOT_KEYS_MAX // 2):
+            if count >= 2:
+                hits[key] = count // 2
+        self._hits = hits
+        self._lookups = {key: self._lookups[key] for key in hits}
+        self._last_decay = time.monotonic()
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(REFRESH_INTERVAL)
+            try:
+                await self.refresh_hot_entries()
+            except Exception:
+                logger.exception("Maps cache refresh error")
+
+    async def refresh_hot_entries(self):
+        """Re-fetch the most requested lookups that are about to go stale"""
+        semaphore = asyncio.Semaphore(REFRESH_CONCURRENCY)
+        deadline = time.time() + REFRESH_WINDOW
+
+        async def refresh(key: str, method: str, args: tuple):
+            entry = await cache.aget(key)
+            if entry is None or entry["fresh_until"] > deadline:
+                return
+            # Mark it stale so the lookup goes back to the API (conditionally
+            # when it has validators) and stores a fresh entry
+            fresh_until = entry["fresh_until"]
+            entry["fresh_until"] = 0
+            await _store_entry(key, entry)
+            async with semaphore:
+                await getattr(self, method)(*args)
+            # A failed fetch stores nothing; put back the still-valid entry
+            # rather than leave it marked stale
+            current = await cache.aget(key)
+            if current is None or current["fresh_until"] == 0:
+                entry["fresh_until"] = fresh_until
+                await _store_entry(key, entry)
+            # Don't count our own call as demand
+            if self._hits[key] > 0:
+                self._hits[key] -= 1
+
+        hot = [
+            (key, *self._lookups[key])
+            for key, _ in self._hits.most_common(REFRESH_TOP_N)
+            if key in self._lookups
+        ]
+        await asyncio.gather(*(refresh(*item) for item in hot))
+        if time.monotonic() - self._last_decay >= HOT_KEYS_DECAY_INTERVAL:
+            self._decay_hits()
+
+    async def _get_with_backoff(self, url: str, **kwargs) -> httpx.Response:
+        """GET, retrying with exponential backoff while rate limited"""
+        for attempt in range(RETRY_ATTEMPTS):
+            response = await self.client.get(url, **kwargs)
+            if response.status_code not in RETRY_STATUSES:
+                break
+            if attempt < RETRY_ATTEMPTS - 1:
+                await asyncio.sleep(2**attempt)
+        return response
+
+    def calculate_distance(
+        self, lat1: float, lng1: float, lat2: float, lng2: float
+    ) -> float:
+        """
+        Calculate distance between two points using Haversine formula
+        Returns distance in kilometers
+        """
+        R = 6371  # Earth's radius in km
+
+        sin_half_dlat = math.sin(math.radians(lat2 - lat1) / 2)
+        sin_half_dlng = math.sin(math.radians(lng2 - lng1) / 2)
+
+        a = (
+            sin_half_dlat * sin_half_dlat
+            + math.cos(math.radians(lat1))
+            * math.cos(math.radians(lat2))
+            * sin_half_dlng
+            * sin_half_dlng
+        )
+
+        # asin form: one sqrt and no atan2; clamp float error above 1
+        return 2 * R * math.asin(math.sqrt(min(a, 1.0)))
+
+    def calculate_distances_batch(
+        self, lat: float, lng: float, lats: List[float], lngs: List[float]
+    ) -> np.ndarray:
+        """
+        Haversine distance from one point to many points at once
+        Returns an array of distances in kilometers
+        """
+        R = 6371  # Earth's radius in km
+
+        lats_arr = np.asarray(lats, dtype=np.float64)
+        lngs_arr = np.asarray(lngs, dtype=np.float64)
+
+        if njit is not None:
+            out = np.empty_like(lats_arr)
+            _haversine_km(lat, lng, lats_arr, lngs_arr, out)
+            return out
+
+        delta_lat = np.radians(lats_arr - lat)
+        delta_lng = np.radians(lngs_arr - lng)
+
+        a = (
+            np.sin(delta_lat / 2) ** 2
+            + math.cos(math.radians(lat))
+            * np.cos(np.radians(lats_arr))
+            * np.sin(delta_lng / 2) ** 2
+        )
+
+        return 2 * R * np.arcsin(np.sqrt(a))
+
+    async def geocode_batch(
+        self, addresses: List[str], concurrency: int = NOMINATIM_CONCURRENCY
+    ) -> List[Optional[Dict]]:
+        """
+        Geocode many addresses concurrently
+        Duplicates are looked up once; results keep the input order
+
+        Returns:
+            One geocode_address result (or None) per address
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def geocode_one(address: str) -> Optional[Dict]:
+            async with semaphore:
+                return await self.geocode_address(address)
+
+        unique = list(dict.fromkeys(addresses))
+        results = await asyncio.gather(*(geocode_one(a) for a in unique))
+        by_address = dict(zip(unique, results))
+
+        return [by_address[a] for a in addresses]
+
+    async def calculate_eta(
+        self, bus_lat: float, bus_lng: float, stop_lat: float, stop_lng: float
+    ) -> Dict:
+        """
+        Calculate ETA from bus current position to boarding point
+        Uses the provider's road-network eta_table for accurate routing
+        Falls back to straight-line distance if routing fails
+
+        Returns:
+            {
+                "distance_km": 5.2,
+                "eta_minutes": 15,
+                "eta_time": "2025-11-16T10:30:00"
+            }
+        """
+        # Try road routing first for an accurate ETA
+        table = await self.eta_table([(bus_lat, bus_lng)], [(stop_lat, stop_lng)])
+        duration_seconds = table["durations"][0][0] if table else None
+
+        if duration_seconds is not None:
+            distance_km = table["distances"][0][0]
+            eta_minutes = int(duration_seconds / 60)
+        else:
+            # Fallback: straight-line distance
+            distance_km = self.calculate_distance(bus_lat, bus_lng, stop_lat, stop_lng)
+            # Assume average speed 40 km/h in city
+            eta_minutes = int((distance_km / 40) * 60)
+
+        # Calculate arrival time
+        eta_time = datetime.now() + timedelta(minutes=eta_minutes)
+
+        return {
+            "distance_km": round(distance_km, 2),
+            "eta_minutes": eta_minutes,
+            "eta_time": eta_time.isoformat(),
+        }
+
+    # Provider lookups (also re-run by name from the cache refresher)
+
+    @abstractmethod
+    async def geocode_address(self, address: str) -> Optional[Dict]:
+        """Convert an address to {"lat", "lng", "display_name", "address"}"""
+
+    @abstractmethod
+    async def reverse_geocode(self, lat: float, lng: float) -> Optional[Dict]:
+        """Convert coordinates to {"display_name", "address", ...}"""
+
+    @abstractmethod
+    async def get_route(
+        self,
+        start_lat: float,
+        start_lng: float,
+        end_lat: float,
+        end_lng: float,
+        detail: str = "full",
+    ) -> Optional[Dict]:
+        """Road route as {"distance" (km), "duration" (s), "geometry", "steps"}"""
+
+    @abstractmethod
+    async def eta_table(
+        self,
+        sources: List[Tuple[float, float]],
+        destinations: List[Tuple[float, float]],
+    ) -> Optional[Dict]:
+        """Travel time (s) and distance (km) matrices between (lat, lng) points"""
+
+    @abstractmethod
+    async def get_nearby_places(
+        self, lat: float, lng: float, radius: int = 500, place_type: str = "restaurant"
+    ) -> List[Dict]:
+        """Places of a type within radius meters, nearest first"""
+
+
+class OSMMapsService(BaseMapsService):
     """
     OpenStreetMap-based location service
     Uses: Nominatim (geocoding), OSRM (routing), Overpass (POI)
@@ -23,9 +434,11 @@ class MapsService:
         self.overpass_base = "https://overpass-api.de/api"
 
         # Required headers for Nominatim (must identify your app)
-        self.headers = {
-            "User-Agent": "BusAgentUB/1.0 (Student Project; asiful.islam12@northsouth.edu)"
-        }
+        super().__init__(
+            headers={
+                "User-Agent": "BusAgentUB/1.0 (Student Project; asiful.islam12@northsouth.edu)"
+            }
+        )
 
     async def geocode_address(self, address: str) -> Optional[Dict]:
         """
@@ -40,33 +453,42 @@ class MapsService:
                 "address": {...}
             }
         """
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            try:
-                response = await client.get(
-                    f"{self.nominatim_base}/search",
-                    params={
-                        "q": address,
-                        "format": "json",
-                        "limit": 1,
-                        "countrycodes": "bd",  # Bangladesh only
-                    },
-                    headers=self.headers,
-                )
-
-                if response.status_code == 200:
-                    results = response.json()
-                    if results:
-                        result = results[0]
-                        return {
-                            "lat": float(result["lat"]),
-                            "lng": float(result["lon"]),
-                            "display_name": result["display_name"],
-                            "address": result.get("address", {}),
-                        }
-                return None
-            except Exception as e:
-                print(f"Geocoding error: {e}")
-                return None
+        key = geocode_key(address)
+        self._track(key, "geocode_address", address)
+        entry = await cache.aget(key)
+        if _is_fresh(entry):
+            return entry["data"]
+
+        try:
+            response = await self._get_with_backoff(
+                f"{self.nominatim_base}/search",
+                params={
+                    "q": address,
+                    "format": "json",
+                    "limit": 1,
+                    "countrycodes": "bd",  # Bangladesh only
+                },
+                headers=_conditional_headers(entry),
+            )
+
+            if response.status_code == 304 and entry is not None:
+                return await _revalidated(key, entry)
+
+            if response.status_code == 200:
+                results = _json(response)
+                if results:
+                    result = results[0]
+                    geocoded = {
+                        "lat": float(result["lat"]),
+                        "lng": float(result["lon"]),
+                        "display_name": result["display_name"],
+                        "address": result.get("address", {}),
+                    }
+                    return await _cache_data(key, geocoded, response)
+            return None
+        except Exception:
+            logger.exception("Geocoding error")
+            return None
 
     async def reverse_geocode(self, lat: float, lng: float) -> Optional[Dict]:
         """
@@ -83,123 +505,165 @@ class MapsService:
                 }
             }
         """
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            try:
-                response = await client.get(
-                    f"{self.nominatim_base}/reverse",
-                    params={"lat": lat, "lon": lng, "format": "json"},
-                    headers=self.headers,
-                )
-
-                if response.status_code == 200:
-                    return response.json()
-                return None
-            except Exception as e:
-                print(f"Reverse geocoding error: {e}")
-                return None
-
-    def calculate_distance(
-        self, lat1: float, lng1: float, lat2: float, lng2: float
-    ) -> float:
-        """
-        Calculate distance between two points using Haversine formula
-        Returns distance in kilometers
-        """
-        R = 6371  # Earth's radius in km
-
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lng = math.radians(lng2 - lng1)
-
-        a = (
-            math.sin(delta_lat / 2) ** 2
-            + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lng / 2) ** 2
-        )
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-        return R * c
+        key = reverse_geocode_key(lat, lng)
+        self._track(key, "reverse_geocode", lat, lng)
+        entry = await cache.aget(key)
+        if _is_fresh(entry):
+            return entry["data"]
+
+        try:
+            response = await self._get_with_backoff(
+                f"{self.nominatim_base}/reverse",
+                params={"lat": lat, "lon": lng, "format": "json"},
+                headers=_conditional_headers(entry),
+            )
+
+            if response.status_code == 304 and entry is not None:
+                return await _revalidated(key, entry)
+
+            if response.status_code == 200:
+                return await _cache_data(key, _json(response), response)
+            return None
+        except Exception:
+            logger.exception("Reverse geocoding error")
+            return None
 
     async def get_route(
-        self, start_lat: float, start_lng: float, end_lat: float, end_lng: float
+        self,
+        start_lat: float,
+        start_lng: float,
+        end_lat: float,
+        end_lng: float,
+        detail: str = "full",
     ) -> Optional[Dict]:
         """
         Get route between two points using OSRM
 
+        Args:
+            detail: "full" for geometry and turn-by-turn steps,
+                "none" for distance and duration only (much smaller response)
+
         Returns:
             {
                 "distance": 15.2,  # km
                 "duration": 1800,  # seconds (30 min)
-                "geometry": [...],  # route coordinates
-                "steps": [...]  # turn-by-turn directions
+                "geometry": [...],  # route coordinates (None if detail="none")
+                "steps": [...]  # turn-by-turn directions ([] if detail="none")
             }
         """
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            try:
-                # OSRM route API
-                coords = f"{start_lng},{start_lat};{end_lng},{end_lat}"
-                response = await client.get(
-                    f"{self.osrm_base}/route/v1/driving/{coords}",
-                    params={
-                        "overview": "full",
-                        "steps": "true",
-                        "geometries": "geojson",
-                    },
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get("code") == "Ok" and data.get("routes"):
-                        route = data["routes"][0]
-                        return {
-                            "distance": route["distance"] / 1000,  # meters to km
-                            "duration": route["duration"],  # seconds
-                            "geometry": route["geometry"]["coordinates"],
-                            "steps": route["legs"][0].get("steps", []),
-                        }
-                return None
-            except Exception as e:
-                print(f"Route calculation error: {e}")
-                return None
-
-    async def calculate_eta(
-        self, bus_lat: float, bus_lng: float, stop_lat: float, stop_lng: float
-    ) -> Dict:
+        key = route_key(start_lat, start_lng, end_lat, end_lng, detail)
+        self._track(key, "get_route", start_lat, start_lng, end_lat, end_lng, detail)
+        entry = await cache.aget(key)
+        if _is_fresh(entry):
+            return entry["data"]
+
+        try:
+            # OSRM route API
+            coords = f"{start_lng},{start_lat};{end_lng},{end_lat}"
+            response = await self._get_with_backoff(
+                f"{self.osrm_base}/route/v1/driving/{coords}",
+                params=(
+                    {"overview": "full", "steps": "true", "geometries": "geojson"}
+                    if detail == "full"
+                    else {"overview": "false", "steps": "false"}
+                ),
+                headers=_conditional_headers(entry),
+                timeout=15.0,
+            )
+
+            if response.status_code == 304 and entry is not None:
+                return await _revalidated(key, entry)
+
+            if response.status_code == 200:
+                data = _json(response)
+                if data.get("code") == "Ok" and data.get("routes"):
+                    route = data["routes"][0]
+                    result = {
+                        "distance": route["distance"] / 1000,  # meters to km
+                        "duration": route["duration"],  # seconds
+                        "geometry": None,
+                        "steps": [],
+                    }
+                    if detail == "full":
+                        result["geometry"] = route["geometry"]["coordinates"]
+                        result["steps"] = route["legs"][0].get("steps", [])
+                    return await _cache_data(key, result, response)
+            return None
+        except Exception:
+            logger.exception("Route calculation error")
+            return None
+
+    async def eta_table(
+        self,
+        sources: List[Tuple[float, float]],
+        destinations: List[Tuple[float, float]],
+    ) -> Optional[Dict]:
         """
-        Calculate ETA from bus current position to boarding point
-        Uses OSRM for accurate routing
-        Falls back to straight-line distance if OSRM fails
+        Many-to-many travel times using the OSRM table service
+        One request covers every source/destination pair
+
+        Args:
+            sources, destinations: (lat, lng) points
 
         Returns:
             {
-                "distance_km": 5.2,
-                "eta_minutes": 15,
-                "eta_time": "2025-11-16T10:30:00"
+                "durations": [[1800.0, ...], ...],  # seconds, per source row
+                "distances": [[15.2, ...], ...]  # km, per source row
             }
+            Unreachable pairs are None
         """
-        # Try OSRM first for accurate route
-        route = await self.get_route(bus_lat, bus_lng, stop_lat, stop_lng)
-
-        if route:
-            distance_km = route["distance"]
-            duration_seconds = route["duration"]
-            eta_minutes = int(duration_seconds / 60)
-        else:
-            # Fallback: straight-line distance
-            distance_km = self.calculate_distance(bus_lat, bus_lng, stop_lat, stop_lng)
-            # Assume average speed 40 km/h in city
-            eta_minutes = int((distance_km / 40) * 60)
-
-        # Calculate arrival time
-        from datetime import timedelta
-
-        eta_time = datetime.now() + timedelta(minutes=eta_minutes)
+        if not sources or not destinations:
+            return None
+
+        # The single pair calculate_eta asks for is cached like a route
+        key = None
+        entry = None
+        if len(sources) == 1 and len(destinations) == 1:
+            (source_lat, source_lng), (dest_lat, dest_lng) = sources[0], destinations[0]
+            key = route_key(source_lat, source_lng, dest_lat, dest_lng, "eta")
+            self._track(key, "eta_table", sources, destinations)
+            entry = await cache.aget(key)
+            if _is_fresh(entry):
+                return entry["data"]
+
+        coords = ";".join(f"{lng},{lat}" for lat, lng in sources + destinations)
+        source_idx = ";".join(str(i) for i in range(len(sources)))
+        dest_idx = ";".join(
+            str(i) for i in range(len(sources), len(sources) + len(destinations))
+        )
 
-        return {
-            "distance_km": round(distance_km, 2),
-            "eta_minutes": eta_minutes,
-            "eta_time": eta_time.isoformat(),
-        }
+        try:
+            response = await self._get_with_backoff(
+                f"{self.osrm_base}/table/v1/driving/{coords}",
+                params={
+                    "sources": source_idx,
+                    "destinations": dest_idx,
+                    "annotations": "duration,distance",
+                },
+                headers=_conditional_headers(entry),
+                timeout=15.0,
+            )
+
+            if response.status_code == 304 and entry is not None:
+                return await _revalidated(key, entry)
+
+            if response.status_code == 200:
+                data = _json(response)
+                if data.get("code") == "Ok":
+                    table = {
+                        "durations": data["durations"],
+                        "distances": [
+                            [d / 1000 if d is not None else None for d in row]
+                            for row in data["distances"]
+                        ],  # meters to km
+                    }
+                    if key is not None:
+                        return await _cache_data(key, table, response)
+                    return table
+            return None
+        except Exception:
+            logger.exception("ETA table error")
+            return None
 
     async def get_nearby_places(
         self, lat: float, lng: float, radius: int = 500, place_type: str = "restaurant"
@@ -223,75 +687,88 @@ class MapsService:
                 }
             ]
         """
-        # Map common types to OSM tags
-        type_mapping = {
-            "restaurant": "amenity=restaurant",
-            "hospital": "amenity=hospital",
-            "atm": "amenity=atm",
-            "pharmacy": "amenity=pharmacy",
-            "fuel": "amenity=fuel",
-            "hotel": "tourism=hotel",
-        }
+        key = nearby_key(lat, lng, radius, place_type)
+        self._track(key, "get_nearby_places", lat, lng, radius, place_type)
+        entry = await cache.aget(key)
+        if _is_fresh(entry):
+            return entry["data"]
 
-        osm_tag = type_mapping.get(place_type, f"amenity={place_type}")
+        osm_tag = PLACE_TYPE_TAGS.get(place_type, f"amenity={place_type}")
 
-        # Overpass QL query
-        query = f"""
-        [out:json];
-        (
-          node[{osm_tag}](around:{radius},{lat},{lng});
-          way[{osm_tag}](around:{radius},{lat},{lng});
-        );
-        out center 20;
-        """
+        query = OVERPASS_NEARBY_QUERY.format(
+            tag=osm_tag, radius=radius, lat=lat, lng=lng, limit=OVERPASS_MAX_RESULTS
+        )
 
-        async with httpx.AsyncClient(timeout=20.0) as client:
-            try:
-                response = await client.get(
-                    f"{self.overpass_base}/interpreter", params={"data": query}
+        try:
+            # POST keeps the query out of the URL (no encoding, no length cap).
+            # The body is streamed into one buffer and parsed once, so the
+            # response object doesn't hold its own copy of a large payload
+            async with self.client.stream(
+                "POST",
+                f"{self.overpass_base}/interpreter",
+                data={"data": query},
+                timeout=20.0,
+            ) as response:
+                if response.status_code != 200:
+                    return []
+
+                body = bytearray()
+                async for chunk in response.aiter_bytes(OVERPASS_CHUNK_SIZE):
+                    body.extend(chunk)
+
+            data = orjson.loads(body)
+            del body
+
+            elements = []
+            lats = []
+            lngs = []
+
+            for element in data.get("elements", []):
+                # Get coordinates
+                if element["type"] == "node":
+                    elem_lat = element["lat"]
+                    elem_lng = element["lon"]
+                else:  # way
+                    elem_lat = element.get("center", {}).get("lat")
+                    elem_lng = element.get("center", {}).get("lon")
+
+                if not elem_lat or not elem_lng:
+                    continue
+
+                elements.append(element)
+                lats.append(elem_lat)
+                lngs.append(elem_lng)
+
+            # Calculate all distances in one pass (km to m)
+            distances = self.calculate_distances_batch(lat, lng, lats, lngs) * 1000
+
+            # Pick the nearest NEARBY_LIMIT without sorting every candidate
+            nearest = np.arange(len(distances))
+            if len(distances) > NEARBY_LIMIT:
+                nearest = np.argpartition(distances, NEARBY_LIMIT)[:NEARBY_LIMIT]
+            nearest = nearest[np.argsort(distances[nearest])]
+
+            # Build results nearest first
+            places = []
+            for i in nearest:
+                element = elements[i]
+                places.append(
+                    {
+                        "name": element.get("tags", {}).get("name", "Unnamed"),
+                        "lat": lats[i],
+                        "lng": lngs[i],
+                        "type": place_type,
+                        "distance_m": int(distances[i]),
+                        "tags": element.get("tags", {}),
+                    }
                 )
 
-                if response.status_code == 200:
-                    data = response.json()
-                    places = []
-
-                    for element in data.get("elements", [])[:20]:  # Limit to 20
-                        # Get coordinates
-                        if element["type"] == "node":
-                            elem_lat = element["lat"]
-                            elem_lng = element["lon"]
-                        else:  # way
-                            elem_lat = element.get("center", {}).get("lat")
-                            elem_lng = element.get("center", {}).get("lon")
-
-                        if not elem_lat or not elem_lng:
-                            continue
-
-                        # Calculate distance
-                        distance = (
-                            self.calculate_distance(lat, lng, elem_lat, elem_lng) * 1000
-                        )  # km to m
-
-                        places.append(
-                            {
-                                "name": element.get("tags", {}).get("name", "Unnamed"),
-                                "lat": elem_lat,
-                                "lng": elem_lng,
-                                "type": place_type,
-                                "distance_m": int(distance),
-                                "tags": element.get("tags", {}),
-                            }
-                        )
-
-                    # Sort by distance
-                    places.sort(key=lambda x: x["distance_m"])
-                    return places
-
-                return []
-            except Exception as e:
-                print(f"Nearby places error: {e}")
-                return []
+            return await _cache_data(key, places)
+
+        except Exception:
+            logger.exception("Nearby places error")
+            return []
 
 
 # Singleton instance
-maps_service = MapsService()
+maps_service = OSMMapsService()
@@ -0,0 +1,86 @@
+"""
+Owner revenue materialized view upkeep (PostgreSQL only)
+/owner/revenue-summary reads past days from owner_revenue_daily, so the view
+is refreshed at startup and again shortly after every UTC midnight
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+# How long after UTC midnight the nightly refresh runs (seconds), leaving
+# late writes for the previous day time to commit
+REFRESH_DELAY = 300
+
+_view_exists = False
+
+
+def revenue_view_exists(db: Session) -> bool:
+    """Whether owner_revenue_daily has been created (checked until it has)"""
+    global _view_exists
+    if not _view_exists:
+        _view_exists = (
+            db.execute(text("SELECT to_regclass('owner_revenue_daily')")).scalar()
+            is not None
+        )
+    return _view_exists
+
+
+def refresh_owner_revenue_daily() -> bool:
+    """Rebuild the view without blocking dashboard reads (False off PostgreSQL)"""
+    if engine.dialect.name != "postgresql":
+        return False
+
+    with engine.begin() as conn:
+        conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY owner_revenue_daily"))
+    return True
+
+
+class RevenueViewRefresher:
+    """Background task that keeps owner_revenue_daily current"""
+
+    def __init__(self, delay: int = REFRESH_DELAY):
+        self.delay = delay
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the refresh loop (call from app startup; no-op off PostgreSQL)"""
+        if self._task is None and engine.dialect.name == "postgresql":
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        """Stop the refresh loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            # Refresh first too, in case the app was down over a midnight
+            try:
+                await asyncio.to_thread(refresh_owner_revenue_daily)
+                logger.info("owner_revenue_daily refreshed")
+            except Exception:
+                logger.exception("owner_revenue_daily refresh error")
+
+            now = datetime.utcnow()
+            next_run = datetime.combine(
+                now.date() + timedelta(days=1), datetime.min.time()
+            ) + timedelta(seconds=self.delay)
+            await asyncio.sleep((next_run - now).total_seconds())
+
+
+# Singleton instance
+revenue_view_refresher = RevenueViewRefresher()
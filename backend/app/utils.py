@@ -1,18 +1,34 @@
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from hashlib import blake2b
+from typing import Dict, Optional, Tuple
 
 import bcrypt
-from jose import JWTError, jwt
+import jwt
+from jwt import InvalidTokenError
+from pydantic import ValidationError
 
 from app.config import settings
-from app.schemas.user import TokenData, UserRole
+from app.schemas.user import TokenData
+
+# Decoded JWTs are reused for a few minutes (never past their own expiry)
+# so repeat requests skip signature verification
+TOKEN_CACHE_TTL = 300  # seconds
+TOKEN_CACHE_MAX_SIZE = 4096
+
+# 16-byte token digest -> (expires_at, TokenData)
+_token_cache: Dict[bytes, Tuple[float, TokenData]] = {}
 
 
 # Password utilities
 def hash_password(password: str) -> str:
-    """Hash a plain password using bcrypt"""
+    """
+    Hash a plain password using bcrypt
+    Blocking (~0.25 s at cost 12): call from sync routes, which FastAPI
+    runs in its threadpool, or via asyncio.to_thread from async code
+    """
     password_bytes = password.encode("utf-8")
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode("utf-8")
 
@@ -63,6 +79,16 @@ def decode_access_token(token: str) -> Optional[TokenData]:
     Returns:
         TokenData object if valid, None if invalid
     """
+    key = blake2b(token.encode("utf-8"), digest_size=16).digest()
+    now = time.time()
+
+    cached = _token_cache.get(key)
+    if cached is not None:
+        expires_at, token_data = cached
+        if expires_at > now:
+            return token_data
+        _token_cache.pop(key, None)
+
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -75,7 +101,16 @@ def decode_access_token(token: str) -> Optional[TokenData]:
         if user_id is None or phone is None or role is None:
             return None
 
-        return TokenData(user_id=user_id, phone=phone, role=UserRole(role))
+        # role is validated as a Literal, no Enum round-trip needed
+        token_data = TokenData(user_id=user_id, phone=phone, role=role)
 
-    except JWTError:
+    except (InvalidTokenError, ValidationError):
         return None
+
+    expires_at = min(now + TOKEN_CACHE_TTL, float(payload.get("exp", now)))
+    if expires_at > now:
+        if len(_token_cache) >= TOKEN_CACHE_MAX_SIZE:
+            _token_cache.clear()
+        _token_cache[key] = (expires_at, token_data)
+
+    return token_data
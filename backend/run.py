@@ -11,10 +11,21 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
 
 if __name__ == "__main__":
+    # DEV=1 turns on auto-reload (reload always runs a single process)
+    dev = os.getenv("DEV") == "1"
+
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        # "auto" picks uvloop and httptools when installed (they are in
+        # requirements.txt) and falls back to asyncio/h11 where they aren't
+        # available, e.g. uvloop on Windows
+        loop="auto",
+        http="auto",
+        # WebSocket subscribers and queued location updates live in process
+        # memory, so keep one worker unless WEB_CONCURRENCY asks for more
+        workers=1 if dev else int(os.getenv("WEB_CONCURRENCY", "1")),
+        reload=dev,
         log_level="info"
     )
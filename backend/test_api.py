@@ -1,26 +1,25 @@
 #!/usr/bin/env python3
 """
 Simple API test script for Bus AgentUB Backend
+Independent checks run concurrently on one shared httpx.AsyncClient
 """
 
-import requests
-import json
-from datetime import datetime, timedelta
+import asyncio
+
+import httpx
 
 BASE_URL = "http://localhost:8000"
 
-def test_health_check():
+async def test_health_check(client):
     """Test health check endpoint"""
+    response = await client.get("/health")
     print("Testing health check...")
-    response = requests.get(f"{BASE_URL}/health")
     print(f"Status: {response.status_code}")
     print(f"Response: {response.json()}")
     print()
 
-def test_user_registration():
+async def test_user_registration(client):
     """Test user registration"""
-    print("Testing user registration...")
-    
     # Register a passenger
     passenger_data = {
         "name": "Test Passenger",
@@ -30,7 +29,8 @@ def test_user_registration():
         "role": "passenger"
     }
     
-    response = requests.post(f"{BASE_URL}/auth/register", json=passenger_data)
+    response = await client.post("/auth/register", json=passenger_data)
+    print("Testing user registration...")
     print(f"Status: {response.status_code}")
     if response.status_code == 201:
         data = response.json()
@@ -41,10 +41,10 @@ def test_user_registration():
         print(f"Error: {response.json()}")
         return None
 
-def test_bus_search():
+async def test_bus_search(client):
     """Test bus search"""
+    response = await client.get("/buses")
     print("Testing bus search...")
-    response = requests.get(f"{BASE_URL}/buses")
     print(f"Status: {response.status_code}")
     buses = response.json()
     print(f"Found {len(buses)} buses")
@@ -52,12 +52,10 @@ def test_bus_search():
         print(f"- {bus['bus_number']}: {bus['route_from']} to {bus['route_to']}")
     print()
 
-def test_booking_flow(token):
+async def test_booking_flow(client, token):
     """Test booking flow"""
-    print("Testing booking flow...")
-    
     # Get buses first
-    buses_response = requests.get(f"{BASE_URL}/buses")
+    buses_response = await client.get("/buses")
     buses = buses_response.json()
     
     if not buses:
@@ -70,7 +68,8 @@ def test_booking_flow(token):
     headers = {"Authorization": f"Bearer {token}"}
     booking_data = {"bus_id": bus_id}
     
-    response = requests.post(f"{BASE_URL}/booking/request", json=booking_data, headers=headers)
+    response = await client.post("/booking/request", json=booking_data, headers=headers)
+    print("Testing booking flow...")
     print(f"Booking request status: {response.status_code}")
     
     if response.status_code == 201:
@@ -81,23 +80,28 @@ def test_booking_flow(token):
         print(f"Error: {response.json()}")
     print()
 
-def test_owner_dashboard():
+async def test_registration_and_booking(client):
+    """Register a passenger, then book with their token (must run in order)"""
+    token = await test_user_registration(client)
+    if token:
+        await test_booking_flow(client, token)
+
+async def test_owner_dashboard(client):
     """Test owner dashboard (using sample credentials)"""
-    print("Testing owner dashboard...")
-    
     # Login as owner
     login_data = {
         "phone": "01700000001",
         "password": "password123"
     }
     
-    response = requests.post(f"{BASE_URL}/auth/login", json=login_data)
+    response = await client.post("/auth/login", json=login_data)
     if response.status_code == 200:
         owner_token = response.json()['access_token']
         headers = {"Authorization": f"Bearer {owner_token}"}
         
         # Get dashboard
-        dashboard_response = requests.get(f"{BASE_URL}/owner/dashboard", headers=headers)
+        dashboard_response = await client.get("/owner/dashboard", headers=headers)
+        print("Testing owner dashboard...")
         print(f"Dashboard status: {dashboard_response.status_code}")
         
         if dashboard_response.status_code == 200:
@@ -108,30 +112,31 @@ def test_owner_dashboard():
             print(f"- Total bookings: {dashboard['total_bookings']}")
             print(f"- Total revenue: {dashboard['total_revenue']}")
     else:
+        print("Testing owner dashboard...")
         print(f"Login failed: {response.json()}")
     print()
 
+async def run():
+    """Run independent tests concurrently"""
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=30.0) as client:
+        await asyncio.gather(
+            test_health_check(client),
+            test_bus_search(client),
+            test_registration_and_booking(client),
+            test_owner_dashboard(client),
+        )
+
 def main():
     """Run all tests"""
     print("Starting Bus AgentUB API Tests")
     print("=" * 50)
     
     try:
-        # Test basic endpoints
-        test_health_check()
-        test_bus_search()
-        
-        # Test user registration and booking
-        token = test_user_registration()
-        if token:
-            test_booking_flow(token)
-        
-        # Test owner dashboard
-        test_owner_dashboard()
+        asyncio.run(run())
         
         print("All tests completed!")
         
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print("Could not connect to the API server.")
         print("Make sure the server is running on http://localhost:8000")
     except Exception as e:
@@ -4,68 +4,233 @@ Tests real-time features: location updates, booking notifications, ticket alerts
 """
 
 import asyncio
+import base64
+import ssl
+import sys
+import time
 import websockets
-import json
+import msgspec
+import orjson
 import httpx
-from datetime import datetime
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+# Request bodies are pre-encoded with orjson and sent as content=
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Tokens from earlier runs, keyed by "<base_url> <phone>", so warm runs skip login
+TOKEN_CACHE_PATH = Path("~/.cache/bus_agentub_tokens.json").expanduser()
+
+# WebSocket message output is buffered and written once it reaches this size
+# or the previous write is this old (seconds), so bursts cost one write
+OUTPUT_FLUSH_BYTES = 64 * 1024
+OUTPUT_FLUSH_INTERVAL = 0.1
+
+# How often the shared message timestamp label is refreshed (seconds)
+TIMESTAMP_TICK = 0.5
+
+# Ask the server for msgpack binary frames (?encoding=msgpack) instead of JSON text
+WS_ENCODING = "msgpack"
+
+# First bytes of a msgpack map or array (fixmap/fixarray, map16/32, array16/32);
+# a JSON document never starts with any of these
+MSGPACK_PREFIXES = frozenset(range(0x80, 0xa0)) | {0xdc, 0xdd, 0xde, 0xdf}
+
+msgpack_decoder = msgspec.msgpack.Decoder()
+
+
+def decode_message(message) -> dict:
+    """Decode a WebSocket frame, sniffing msgpack vs JSON from its first byte"""
+    if isinstance(message, bytes) and message and message[0] in MSGPACK_PREFIXES:
+        return msgpack_decoder.decode(message)
+    return orjson.loads(message)
+
+
+def token_expiry(token: str) -> float:
+    """Read the exp claim from a JWT payload (no signature check needed here)"""
+    payload = token.split(".")[1]
+    payload += "=" * (-len(payload) % 4)
+    return orjson.loads(base64.urlsafe_b64decode(payload)).get("exp", 0)
+
+
+def load_cached_tokens() -> dict:
+    try:
+        return orjson.loads(TOKEN_CACHE_PATH.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return {}
+
+
+@dataclass(slots=True)
+class Tokens:
+    """JWT access tokens for the test users, by role"""
+    supervisor: Optional[str] = None
+    passenger: Optional[str] = None
+
+
+@dataclass(slots=True)
+class SeedIds:
+    """Seed data IDs the tests run against (defaults are the first seeded rows)"""
+    bus: int = 1
+    boarding_point: int = 1
 
 
 class WebSocketTester:
     def __init__(self, base_url="http://localhost:8000"):
         self.base_url = base_url
         self.ws_url = base_url.replace("http://", "ws://").replace("https://", "wss://")
-        self.tokens = {}
+        # Multiplexed events endpoint, filled with the token at connect time
+        self._events_ws_template = self.ws_url + "/ws/events?token={token}&encoding=" + WS_ENCODING
+        # One TLS context reused by every wss:// connection
+        self.ssl_context = ssl.create_default_context() if self.ws_url.startswith("wss://") else None
+        self.tokens = Tokens()
+        # Filled from the server once per run by _bootstrap
+        self.ids = SeedIds()
+        # Authorization headers per role (and merged with JSON_HEADERS), built once at login
+        self.auth_headers = {}
+        self.json_auth_headers = {}
+        # Shared client (keep-alive, HTTP/2 over https), opened in run_all_tests
+        self.http: httpx.AsyncClient = None
+        # The passenger's single events socket, and its messages queued by "type"
+        self._mux_ws = None
+        self._queues = defaultdict(asyncio.Queue)
+        # Pending WebSocket message output (see OUTPUT_FLUSH_*)
+        self._out = bytearray()
+        self._last_flush = time.monotonic()
+        # HH:MM:SS label shared by all messages within a tick (see _tick)
+        self._ts = time.strftime("%H:%M:%S")
+    
+    def use_token(self, role: str, token: str):
+        setattr(self.tokens, role, token)
+        self.auth_headers[role] = {"Authorization": f"Bearer {token}"}
+        self.json_auth_headers[role] = {**JSON_HEADERS, **self.auth_headers[role]}
     
     async def login(self, phone: str, password: str, role: str):
-        """Get JWT token for user"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/auth/login",
-                json={"phone": phone, "password": password}
-            )
-            if response.status_code == 200:
-                data = response.json()
-                self.tokens[role] = data["access_token"]
-                print(f"✓ Logged in as {role}: {phone}")
-                return data["access_token"]
-            else:
-                print(f"✗ Login failed for {role}")
-                return None
+        """Get JWT token for user (reusing a cached one that is still valid)"""
+        cache_key = f"{self.base_url} {phone}"
+        token = load_cached_tokens().get(cache_key)
+        if token and token_expiry(token) > time.time() + 60:
+            self.use_token(role, token)
+            print(f"✓ Using cached token for {role}: {phone}")
+            return token
+        
+        response = await self.http.post(
+            "/auth/login",
+            content=orjson.dumps({"phone": phone, "password": password}),
+            headers=JSON_HEADERS
+        )
+        if response.status_code == 200:
+            data = response.json()
+            self.use_token(role, data["access_token"])
+            print(f"✓ Logged in as {role}: {phone}")
+            
+            # Re-read right before writing so concurrent logins don't drop entries
+            cached = load_cached_tokens()
+            cached[cache_key] = data["access_token"]
+            TOKEN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            TOKEN_CACHE_PATH.write_bytes(orjson.dumps(cached))
+            return data["access_token"]
+        else:
+            print(f"✗ Login failed for {role}")
+            return None
+    
+    async def _bootstrap(self):
+        """Look up the bus and boarding point IDs once, before any test runs"""
+        if "supervisor" not in self.auth_headers:
+            return
+        
+        response = await self.http.get("/auth/profile", headers=self.auth_headers["supervisor"])
+        assigned_buses = response.json().get("assigned_buses") if response.status_code == 200 else None
+        if not assigned_buses:
+            print(f"⚠️  No assigned bus found, using bus {self.ids.bus}")
+            return
+        self.ids.bus = assigned_buses[0]["id"]
+        
+        response = await self.http.get(f"/buses/{self.ids.bus}/stops")
+        stops = response.json() if response.status_code == 200 else None
+        if stops:
+            self.ids.boarding_point = stops[0]["id"]
+        print(f"✓ Using bus {self.ids.bus}, boarding point {self.ids.boarding_point}")
     
-    async def connect_websocket(self, token: str, connection_type: str, entity_id: int = None):
+    async def connect_websocket(self, token: str, ready: asyncio.Event = None):
         """
-        Connect to WebSocket endpoint
+        Connect to the multiplexed events WebSocket and dispatch its messages
         
         Args:
             token: JWT access token
-            connection_type: 'location', 'booking', or 'ticket'
-            entity_id: Bus ID, Booking ID, or Ticket ID
+            ready: Set once the connection is live (or the connection failed)
         """
-        if entity_id:
-            ws_endpoint = f"{self.ws_url}/ws/{connection_type}/{entity_id}?token={token}"
-        else:
-            ws_endpoint = f"{self.ws_url}/ws/{connection_type}?token={token}"
+        ws_endpoint = self._events_ws_template.format(token=token)
         
         try:
-            async with websockets.connect(ws_endpoint) as websocket:
-                print(f"✓ Connected to WebSocket: {connection_type}" + 
-                      (f" (ID: {entity_id})" if entity_id else ""))
+            # Tuned for short-lived sockets receiving small, bursty frames:
+            # no permessage-deflate (adds CPU and latency), no keepalive pings,
+            # and a deep receive queue so bursts never stall the reader
+            async with websockets.connect(
+                ws_endpoint,
+                ssl=self.ssl_context,
+                compression=None,
+                ping_interval=None,
+                ping_timeout=None,
+                max_queue=2**12,
+                max_size=2**20,
+                read_limit=2**18,
+                open_timeout=5
+            ) as websocket:
+                print("✓ Connected to WebSocket: events")
+                self._mux_ws = websocket
+                if ready:
+                    ready.set()
                 
-                # Listen for messages
+                # Print every message and hand it to whichever test waits on its type
                 async for message in websocket:
-                    data = json.loads(message)
-                    self.print_websocket_message(connection_type, data)
+                    data = decode_message(message)
+                    self.print_websocket_message("events", data)
+                    self._queues[data.get("type")].put_nowait(data)
         
         except websockets.exceptions.ConnectionClosed:
-            print(f"✓ WebSocket connection closed normally")
-        except Exception as e:
+            # Server closed the socket: a normal end of a test
+            pass
+        except (websockets.exceptions.WebSocketException, ConnectionError, OSError) as e:
+            # CancelledError is not caught here and propagates to the TaskGroup
             print(f"✗ WebSocket connection failed: {e}")
+        finally:
+            self._mux_ws = None
+            # Never leave a test waiting on a connection that failed
+            if ready:
+                ready.set()
+            self.flush_output()
+    
+    async def next_event(self, event_type: str, timeout: float) -> Optional[dict]:
+        """Wait for the next events-socket message of a type (None on timeout)"""
+        try:
+            return await asyncio.wait_for(self._queues[event_type].get(), timeout)
+        except TimeoutError:
+            return None
     
     def print_websocket_message(self, msg_type: str, data: dict):
-        """Pretty print WebSocket messages"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"\n[{timestamp}] 📡 WebSocket Message ({msg_type}):")
-        print(json.dumps(data, indent=2))
+        """Pretty print WebSocket messages (buffered)"""
+        self._out += f"\n[{self._ts}] 📡 WebSocket Message ({msg_type}):\n".encode()
+        self._out += orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+        if (len(self._out) >= OUTPUT_FLUSH_BYTES
+                or time.monotonic() - self._last_flush >= OUTPUT_FLUSH_INTERVAL):
+            self.flush_output()
+    
+    async def _tick(self):
+        """Refresh the message timestamp label until cancelled"""
+        while True:
+            self._ts = time.strftime("%H:%M:%S")
+            await asyncio.sleep(TIMESTAMP_TICK)
+    
+    def flush_output(self):
+        """Write buffered WebSocket messages to stdout"""
+        if self._out:
+            sys.stdout.flush()  # keep order with earlier print() output
+            sys.stdout.buffer.write(self._out)
+            sys.stdout.buffer.flush()
+            self._out.clear()
+        self._last_flush = time.monotonic()
     
     async def test_bus_location_updates(self, bus_id: int):
         """Test 1: Real-time bus location updates"""
@@ -73,20 +238,15 @@ class WebSocketTester:
         print("TEST 1: Real-Time Bus Location Updates")
         print("="*60)
         
-        supervisor_token = self.tokens.get("supervisor")
-        passenger_token = self.tokens.get("passenger")
-        
-        if not supervisor_token or not passenger_token:
-            print("✗ Missing tokens")
+        if not self.tokens.supervisor or not self._mux_ws:
+            print("✗ Missing tokens or events connection")
             return
         
-        # Passenger subscribes to bus location updates
-        passenger_task = asyncio.create_task(
-            self.connect_websocket(passenger_token, "location", bus_id)
-        )
-        
-        # Give passenger time to connect
-        await asyncio.sleep(2)
+        # Passenger subscribes to bus location updates on the shared socket
+        await self._mux_ws.send(orjson.dumps({"type": "subscribe", "bus_id": bus_id}).decode())
+        if not await self.next_event("subscribed", timeout=5):
+            print(f"✗ Could not subscribe to bus {bus_id} location")
+            return
         
         # Supervisor updates bus location multiple times
         print("\n🚌 Supervisor updating bus locations...")
@@ -95,25 +255,36 @@ class WebSocketTester:
             {"lat": 23.8050, "lng": 90.4100, "location": "Banani"},
             {"lat": 23.8000, "lng": 90.4050, "location": "Gulshan"}
         ]
+        # Request params and headers don't change per call, build them once
+        params_list = [{"lat": loc["lat"], "lng": loc["lng"]} for loc in locations]
+        supervisor_headers = self.auth_headers["supervisor"]
         
-        async with httpx.AsyncClient() as client:
-            for loc in locations:
-                print(f"\n📍 Updating location: {loc['location']}")
-                response = await client.post(
-                    f"{self.base_url}/location/bus/{bus_id}/update",
-                    params={"lat": loc["lat"], "lng": loc["lng"]},
-                    headers={"Authorization": f"Bearer {supervisor_token}"}
-                )
-                print(f"   Update status: {response.status_code}")
-                await asyncio.sleep(3)
-        
-        await asyncio.sleep(2)
-        passenger_task.cancel()
-        try:
-            await passenger_task
-        except asyncio.CancelledError:
-            pass
-        print("\n✓ Bus location update test complete")
+        async def update_location(index: int, loc: dict, params: dict):
+            # Stagger past the server's 0.2 s location flush window so each
+            # update is broadcast as its own frame, in order
+            await asyncio.sleep(index * 0.5)
+            print(f"\n📍 Updating location: {loc['location']}")
+            response = await self.http.post(
+                f"/location/bus/{bus_id}/update",
+                params=params,
+                headers=supervisor_headers
+            )
+            print(f"   Update status ({loc['location']}): {response.status_code}")
+        
+        await asyncio.gather(
+            *(update_location(i, loc, params)
+              for i, (loc, params) in enumerate(zip(locations, params_list)))
+        )
+        
+        # Collect updates until all arrived or the 2 s window closes
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + 2
+        received = 0
+        while received < len(locations) and loop.time() < deadline:
+            if not await self.next_event("location_update", timeout=deadline - loop.time()):
+                break
+            received += 1
+        print(f"\n✓ Bus location update test complete ({received}/{len(locations)} updates received)")
     
     async def test_booking_notifications(self, bus_id: int):
         """Test 2: Booking status change notifications"""
@@ -121,49 +292,32 @@ class WebSocketTester:
         print("TEST 2: Booking Status Notifications")
         print("="*60)
         
-        passenger_token = self.tokens.get("passenger")
-        supervisor_token = self.tokens.get("supervisor")
-        
         # Create a new booking
         print("\n📝 Passenger creating booking request...")
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/booking/request",
-                json={"bus_id": bus_id},
-                headers={"Authorization": f"Bearer {passenger_token}"}
-            )
-            
-            if response.status_code != 200:
-                print(f"✗ Booking creation failed: {response.text}")
-                return
-            
-            booking = response.json()
-            booking_id = booking["id"]
-            print(f"✓ Booking created: ID {booking_id}")
-        
-        # Passenger subscribes to booking updates
-        passenger_task = asyncio.create_task(
-            self.connect_websocket(passenger_token, "booking")
+        response = await self.http.post(
+            "/booking/request",
+            content=orjson.dumps({"bus_id": bus_id}),
+            headers=self.json_auth_headers["passenger"]
         )
         
-        await asyncio.sleep(2)
+        if response.status_code != 201:
+            print(f"✗ Booking creation failed: {response.text}")
+            return
+        
+        booking = response.json()
+        booking_id = booking["booking_id"]
+        print(f"✓ Booking created: ID {booking_id}")
         
         # Supervisor accepts booking
         print(f"\n✅ Supervisor accepting booking {booking_id}...")
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/booking/accept",
-                json={"booking_id": booking_id},
-                headers={"Authorization": f"Bearer {supervisor_token}"}
-            )
-            print(f"   Accept status: {response.status_code}")
+        response = await self.http.post(
+            f"/booking/{booking_id}/accept",
+            headers=self.auth_headers["supervisor"]
+        )
+        print(f"   Accept status: {response.status_code}")
         
-        await asyncio.sleep(3)
-        passenger_task.cancel()
-        try:
-            await passenger_task
-        except asyncio.CancelledError:
-            pass
+        if not await self.next_event("booking_accepted", timeout=3):
+            print("⚠️  No booking_accepted event received")
         print("\n✓ Booking notification test complete")
         
         return booking_id
@@ -174,64 +328,86 @@ class WebSocketTester:
         print("TEST 3: Ticket Status Alerts")
         print("="*60)
         
-        passenger_token = self.tokens.get("passenger")
-        
         # Confirm ticket
         print("\n🎫 Passenger confirming ticket...")
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/booking/ticket/confirm",
-                json={
-                    "booking_id": booking_id,
-                    "boarding_point_id": boarding_point_id,
-                    "seats_booked": 2
-                },
-                headers={"Authorization": f"Bearer {passenger_token}"}
-            )
-            
-            if response.status_code != 200:
-                print(f"✗ Ticket confirmation failed: {response.text}")
-                return
-            
-            ticket = response.json()
-            ticket_id = ticket["id"]
-            print(f"✓ Ticket confirmed: ID {ticket_id}")
-        
-        # Subscribe to ticket updates
-        passenger_task = asyncio.create_task(
-            self.connect_websocket(passenger_token, "booking")
+        response = await self.http.post(
+            "/booking/ticket/confirm",
+            content=orjson.dumps({
+                "booking_id": booking_id,
+                "boarding_point_id": boarding_point_id,
+                "seats_booked": 2
+            }),
+            headers=self.json_auth_headers["passenger"]
         )
         
-        print("\n📢 Listening for ticket updates...")
-        await asyncio.sleep(5)
+        if response.status_code != 201:
+            print(f"✗ Ticket confirmation failed: {response.text}")
+            return
         
-        passenger_task.cancel()
-        try:
-            await passenger_task
-        except asyncio.CancelledError:
-            pass
+        ticket = response.json()
+        ticket_id = ticket["ticket_id"]
+        print(f"✓ Ticket confirmed: ID {ticket_id}")
+        
+        print("\n📢 Listening for ticket updates...")
+        if not await self.next_event("ticket_confirmed", timeout=5):
+            print("⚠️  No ticket_confirmed event received")
         print("\n✓ Ticket alert test complete")
     
+    async def test_booking_and_ticket(self, bus_id: int, boarding_point_id: int):
+        """Tests 2-3: the ticket test needs the booking accepted in test 2"""
+        booking_id = await self.test_booking_notifications(bus_id=bus_id)
+        if booking_id:
+            await self.test_ticket_alerts(booking_id=booking_id, boarding_point_id=boarding_point_id)
+    
     async def run_all_tests(self):
         """Run complete WebSocket test suite"""
         print("\n" + "="*60)
         print("🧪 WebSocket Integration Test Suite")
         print("="*60)
         
-        # Login all users
-        print("\n📱 Logging in test users...")
-        await self.login("+8801222222222", "supervisor123", "supervisor")
-        await self.login("+8801333333333", "passenger123", "passenger")
-        
-        # Test 1: Bus location updates
-        await self.test_bus_location_updates(bus_id=1)
-        
-        # Test 2: Booking notifications
-        booking_id = await self.test_booking_notifications(bus_id=1)
-        
-        # Test 3: Ticket alerts
-        if booking_id:
-            await self.test_ticket_alerts(booking_id=booking_id, boarding_point_id=1)
+        # One client for every HTTP call in the suite
+        async with httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=20)
+        ) as self.http:
+            # Login all users
+            print("\n📱 Logging in test users...")
+            await asyncio.gather(
+                self.login("+8801222222222", "supervisor123", "supervisor"),
+                self.login("+8801333333333", "passenger123", "passenger")
+            )
+            await self._bootstrap()
+            
+            if not self.tokens.passenger:
+                print("✗ Missing tokens")
+                return
+            
+            # Test 1 is independent of tests 2-3, so run them side by side;
+            # the suite takes as long as the slower branch, not the sum
+            async with asyncio.TaskGroup() as tg:
+                ticker = tg.create_task(self._tick())
+                
+                # All tests share one passenger events socket instead of
+                # opening (and upgrading) a connection each
+                ready = asyncio.Event()
+                events = tg.create_task(self.connect_websocket(self.tokens.passenger, ready=ready))
+                await ready.wait()
+                
+                tests = [
+                    tg.create_task(self.test_bus_location_updates(bus_id=self.ids.bus)),
+                    tg.create_task(self.test_booking_and_ticket(
+                        bus_id=self.ids.bus, boarding_point_id=self.ids.boarding_point
+                    ))
+                ]
+                await asyncio.wait(tests)
+                # Close the events socket cleanly; its reader then leaves the
+                # async for on its own, with no CancelledError through recv
+                if self._mux_ws:
+                    await self._mux_ws.close()
+                await events
+                # The ticker never finishes on its own
+                ticker.cancel()
         
         print("\n" + "="*60)
         print("✅ All WebSocket tests complete!")
@@ -249,4 +425,10 @@ if __name__ == "__main__":
     print("   source venv/bin/activate")
     print("   uvicorn app.main:app --reload\n")
     
-    asyncio.run(main())
+    # uvloop's event loop when available (it isn't on Windows)
+    try:
+        from uvloop import run
+    except ImportError:
+        from asyncio import run
+    
+    run(main())